@@ -0,0 +1,75 @@
+"""
+Headless batch transcription for scheduled jobs.
+
+Reads video URLs, video ids, playlist URLs or playlist ids (one per line)
+and writes one transcript file per video. Re-running with the same output
+resumes where the previous run stopped.
+
+Example:
+    python batch_transcribe.py urls.txt --output transcripts/ --target-lang fr --format srt
+"""
+import sys
+import logging
+import argparse
+from utils.batch import expand_inputs, run_batch, pack_tarball
+from utils.formatters import FORMATS, DEFAULT_FORMAT
+from utils.metrics import write_metrics
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help="File with one URL or id per line, or '-' for stdin")
+    parser.add_argument("--output", "-o", required=True,
+                        help="Output directory (with --tar, the staging directory)")
+    parser.add_argument("--tar", help="Also pack the transcripts into this .tar.gz file")
+    parser.add_argument("--source-lang", default="en")
+    parser.add_argument("--target-lang", default=None)
+    parser.add_argument("--format", choices=list(FORMATS), default=DEFAULT_FORMAT)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--processes", action="store_true", help="Use a process pool instead of threads")
+    parser.add_argument("--titles", action="store_true", help="Name files by video title instead of id")
+    parser.add_argument("--retry-failed", action="store_true", help="Retry videos that failed in an earlier run")
+    parser.add_argument("--metrics", help="Write stage timings and counters to this file "
+                        "(Prometheus text for .prom, JSON otherwise; not collected from --processes workers)")
+    parser.add_argument("--verbose", "-v", action="store_true")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING)
+    logging.getLogger().setLevel(logging.INFO if args.verbose else logging.WARNING)
+
+    if args.input == "-":
+        video_ids, invalid = expand_inputs(sys.stdin)
+    else:
+        with open(args.input, encoding="utf-8") as f:
+            video_ids, invalid = expand_inputs(f)
+    if invalid:
+        print(f"Skipped {len(invalid)} invalid input line(s)", file=sys.stderr)
+
+    def report(result):
+        status = "ok" if result.ok else f"FAILED ({result.category}: {result.error})"
+        print(f"{result.video_id}: {status}", file=sys.stderr)
+
+    summary = run_batch(
+        video_ids, args.output, source_lang=args.source_lang, target_lang=args.target_lang,
+        fmt=args.format, workers=args.workers, use_processes=args.processes, titles=args.titles,
+        retry_failed=args.retry_failed, progress=report,
+    )
+    if args.tar:
+        pack_tarball(args.output, args.tar)
+    if args.metrics:
+        write_metrics(args.metrics)
+
+    print(f"videos: {summary['total']} total, {summary['done']} done, "
+          f"{summary['skipped']} skipped (in checkpoint), {summary['failed']} failed")
+    print(f"throughput: {summary['videos_per_second']:.2f} videos/s, "
+          f"{summary['segments_per_second']:.1f} segments/s over {summary['elapsed']:.1f}s")
+    for category, count in sorted(summary['failures'].items(), key=lambda item: -item[1]):
+        print(f"  {category}: {count}")
+    return 1 if summary['failed'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
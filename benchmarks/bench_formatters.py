@@ -0,0 +1,77 @@
+"""
+Micro-benchmark for transcript rendering over synthetic transcripts.
+
+Run from the repository root:
+    python -m benchmarks.bench_formatters --segments 10000 --max-ms 200
+
+Exits with status 1 if any format takes longer than --max-ms.
+"""
+import io
+import sys
+import time
+import random
+import argparse
+
+from utils.formatters import FORMATS, render_transcript, write_transcript
+
+
+def synthetic_transcript(segments: int, seed: int = 0) -> list:
+    """Build a transcript of short caption fragments with realistic timing."""
+    rng = random.Random(seed)
+    words = ["the", "video", "today", "we", "will", "look", "at", "[Music]", "thank", "you", "for", "watching"]
+    transcript, start = [], 0.0
+    for _ in range(segments):
+        duration = round(rng.uniform(1.5, 4.0), 3)
+        transcript.append({
+            'text': " ".join(rng.choice(words) for _ in range(rng.randint(3, 10))),
+            'start': start,
+            'duration': duration,
+        })
+        start = round(start + duration + rng.uniform(0.0, 0.5), 3)
+    return transcript
+
+
+def legacy_format(transcript: list) -> str:
+    """The original string-concatenation formatter, kept as a baseline."""
+    content = ""
+    for entry in transcript:
+        timestamp = f"[{entry.get('start'):.2f} → {entry.get('start') + entry.get('duration'):.2f}] "
+        content += f"{timestamp}{entry.get('text')}\n"
+    return content
+
+
+def best_of(fn, repeat: int) -> float:
+    """Return the fastest of `repeat` runs in milliseconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return min(timings)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--segments", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--max-ms", type=float, default=None, help="Fail if any format is slower than this")
+    args = parser.parse_args()
+
+    transcript = synthetic_transcript(args.segments)
+    assert render_transcript(transcript, 'txt') == legacy_format(transcript)
+
+    print(f"segments={args.segments} (best of {args.repeat})")
+    print(f"{'legacy txt':>12}: {best_of(lambda: legacy_format(transcript), args.repeat):8.1f} ms")
+    failed = False
+    for fmt in FORMATS:
+        rendered = best_of(lambda: render_transcript(transcript, fmt), args.repeat)
+        streamed = best_of(lambda: write_transcript(transcript, io.StringIO(), fmt), args.repeat)
+        print(f"{fmt:>12}: {rendered:8.1f} ms render  {streamed:8.1f} ms stream")
+        if args.max_ms is not None and max(rendered, streamed) > args.max_ms:
+            print(f"  regression: {fmt} exceeded {args.max_ms} ms")
+            failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
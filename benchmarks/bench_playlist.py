@@ -0,0 +1,63 @@
+"""
+Benchmark playlist metadata loading against a stubbed YouTube class.
+
+Run from the repository root:
+    python -m benchmarks.bench_playlist --videos 300 --latency 0.2
+"""
+import argparse
+import time
+from unittest import mock
+
+from utils import youtube_utils
+from utils.rate_limit import TokenBucket
+from utils.cache import MetadataCache
+
+
+class StubYouTube:
+    """Offline stand-in for pytubefix.YouTube with a fixed network latency."""
+    latency = 0.2
+
+    def __init__(self, url: str):
+        time.sleep(self.latency)
+        self.video_id = url.split("v=")[1]
+        self.title = f"Video {self.video_id}"
+        self.length = 600
+
+
+def run(video_ids, workers: int, rate: float, cache: MetadataCache = None) -> float:
+    """Load all ids and return the elapsed wall-clock time in seconds."""
+    limiter = TokenBucket(rate=rate, capacity=max(1.0, rate))
+    cache = cache if cache is not None else MetadataCache(":memory:")
+    start = time.perf_counter()
+    loaded = sum(1 for _, meta in youtube_utils.iter_video_metadata(
+        video_ids, max_workers=workers, rate_limiter=limiter, cache=cache) if meta)
+    elapsed = time.perf_counter() - start
+    assert loaded == len(video_ids)
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--videos", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.2, help="Simulated seconds per metadata request")
+    parser.add_argument("--workers", type=int, default=youtube_utils.DEFAULT_METADATA_WORKERS)
+    parser.add_argument("--rate", type=float, default=50.0, help="Token bucket refill rate (requests/s)")
+    args = parser.parse_args()
+
+    StubYouTube.latency = args.latency
+    video_ids = [f"vid{i:08d}" for i in range(args.videos)]
+    with mock.patch.object(youtube_utils, "youtube", StubYouTube):
+        serial = run(video_ids, workers=1, rate=args.rate)
+        cache = MetadataCache(":memory:")
+        concurrent = run(video_ids, workers=args.workers, rate=args.rate, cache=cache)
+        cached = run(video_ids, workers=args.workers, rate=args.rate, cache=cache)
+
+    print(f"videos={args.videos} latency={args.latency}s rate={args.rate}/s")
+    print(f"serial      (1 worker):  {serial:8.2f}s  {args.videos / serial:8.1f} videos/s")
+    print(f"concurrent ({args.workers} workers): {concurrent:8.2f}s  {args.videos / concurrent:8.1f} videos/s")
+    print(f"second load (cached):   {cached:8.4f}s")
+    print(f"speedup: {serial / concurrent:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Benchmark fragment merging on synthetic auto-generated captions.
+
+The captions mimic ASR output: 2-3 second fragments of a few words with
+overlapping timings, no punctuation and occasional pauses. Reports the
+reflow time and how much it shrinks the segment count and rendered size.
+
+Run from the repository root:
+    python -m benchmarks.bench_reflow --segments 10000 --max-ms 50
+
+Exits with status 1 if any input takes longer than --max-ms per 10,000 fragments.
+"""
+import sys
+import time
+import random
+import argparse
+
+from utils.formatters import render_transcript
+from utils.reflow import ReflowOptions, reflow_transcript
+from utils.transcript import Transcript
+
+
+def synthetic_captions(count: int, seed: int = 0) -> Transcript:
+    """ASR-like fragments: overlapping 2-3 s windows, a pause every ~100 fragments."""
+    rng = random.Random(seed)
+    vocabulary = [f"word{i}" for i in range(2000)]
+    texts, starts, durations, clock = [], [], [], 0.0
+    for _ in range(count):
+        step = rng.uniform(2.0, 3.0)
+        texts.append(" ".join(rng.choices(vocabulary, k=rng.randint(3, 6))))
+        starts.append(clock)
+        durations.append(step + rng.uniform(0.2, 1.0))
+        clock += step + (rng.uniform(2.0, 6.0) if rng.random() < 0.01 else 0.0)
+    return Transcript.from_columns(texts, starts, durations)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--segments", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--max-ms", type=float, default=None, help="Time budget per 10,000 fragments")
+    args = parser.parse_args()
+
+    options = ReflowOptions()
+    over_budget = []
+    for count in sorted(args.segments):
+        transcript = synthetic_captions(count)
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            merged = reflow_transcript(transcript, options)
+            timings.append(time.perf_counter() - start)
+        best = min(timings) * 1000
+        before, after = len(render_transcript(transcript, 'srt')), len(render_transcript(merged, 'srt'))
+        print(f"{count:>8} fragments -> {len(merged):>7} segments  {best:8.2f} ms  "
+              f"srt {before / 1024:8.0f} KB -> {after / 1024:8.0f} KB ({1 - after / before:.0%} smaller)")
+        if args.max_ms is not None and best > args.max_ms * count / 10000:
+            over_budget.append(f"{count} fragments: {best:.2f} ms > {args.max_ms * count / 10000:.2f} ms")
+
+    if over_budget:
+        print("FAIL: " + "; ".join(over_budget))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+"""
+Benchmark the transcript search index over a synthetic caption corpus.
+
+Builds an index of --hours hours of captions (one segment every
+--segment-seconds, words drawn from a Zipf-like vocabulary so common words
+match millions of segments) and times indexing throughput and query latency
+for rare, common, multi-word, phrase and prefix queries.
+
+Run from the repository root:
+    python -m benchmarks.bench_search --hours 2000 --index /tmp/search.sqlite3
+    python -m benchmarks.bench_search --index /tmp/search.sqlite3 --reuse --max-query-ms 50
+
+An existing index file is reused with --reuse, so a large index only has to
+be built once. Exits with status 1 if the slowest unranked query exceeds
+--max-query-ms.
+"""
+import os
+import sys
+import time
+import random
+import argparse
+
+from utils.search import SearchIndex
+from utils.transcript import Transcript
+
+VOCABULARY = 50000
+WORDS_PER_SEGMENT = 9
+VIDEO_SECONDS = 3600
+QUERIES = ("w3", "w17 w42", "w9876", "\"w1 w2\"", "w123*", "w49999")
+
+
+def synthetic_video(rng: random.Random, weights, segment_seconds: float) -> Transcript:
+    """One hour of captions drawn from the vocabulary."""
+    count = int(VIDEO_SECONDS / segment_seconds)
+    words = rng.choices(range(VOCABULARY), cum_weights=weights, k=count * WORDS_PER_SEGMENT)
+    texts = [" ".join(f"w{word}" for word in words[i:i + WORDS_PER_SEGMENT])
+             for i in range(0, len(words), WORDS_PER_SEGMENT)]
+    return Transcript.from_columns(texts, [i * segment_seconds for i in range(count)], [segment_seconds] * count)
+
+
+def build(index: SearchIndex, hours: int, segment_seconds: float, seed: int) -> float:
+    """Index `hours` one-hour videos; returns segments indexed per second."""
+    rng = random.Random(seed)
+    weights, total = [], 0.0
+    for rank in range(1, VOCABULARY + 1):
+        total += 1.0 / rank
+        weights.append(total)
+    segments, start = 0, time.perf_counter()
+    for video in range(hours):
+        transcript = synthetic_video(rng, weights, segment_seconds)
+        index.add(f"s{video:010d}", 'en', transcript)
+        segments += len(transcript)
+        if (video + 1) % 100 == 0:
+            print(f"  indexed {video + 1}/{hours} hours", file=sys.stderr)
+    index.optimize()
+    return segments / (time.perf_counter() - start)
+
+
+def time_query(index: SearchIndex, query: str, ranked: bool, repeat: int) -> float:
+    """Best of `repeat` runs, in milliseconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        index.search(query, ranked=ranked)
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hours", type=int, default=200, help="Hours of captions to index")
+    parser.add_argument("--segment-seconds", type=float, default=3.0)
+    parser.add_argument("--index", default=":memory:", help="Index file (default: in memory)")
+    parser.add_argument("--reuse", action="store_true", help="Query an existing index file without rebuilding")
+    parser.add_argument("--ranked", action="store_true", help="Also time bm25-ranked queries")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-query-ms", type=float, default=None)
+    args = parser.parse_args()
+
+    if not args.reuse and args.index != ":memory:" and os.path.exists(args.index):
+        os.remove(args.index)
+    index = SearchIndex(args.index)
+    if not args.reuse:
+        rate = build(index, args.hours, args.segment_seconds, args.seed)
+        print(f"indexing: {rate:,.0f} segments/s")
+    stats = index.stats()
+    size = f", {os.path.getsize(args.index) / 1024 / 1024:,.0f} MB" if args.index != ":memory:" else ""
+    print(f"index: {stats['videos']:,} videos, {stats['segments']:,} segments{size}")
+
+    slowest = 0.0
+    for query in QUERIES:
+        unranked = time_query(index, query, False, args.repeat)
+        slowest = max(slowest, unranked)
+        line = f"  {query:<12} {unranked:8.2f} ms"
+        if args.ranked:
+            line += f"   ranked {time_query(index, query, True, args.repeat):10.2f} ms"
+        print(line)
+
+    if args.max_query_ms is not None and slowest > args.max_query_ms:
+        print(f"FAIL: slowest query {slowest:.2f} ms > {args.max_query_ms} ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
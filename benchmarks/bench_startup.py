@@ -0,0 +1,124 @@
+"""
+Cold-start benchmark: import cost of the app modules and time to first render.
+
+Each measurement runs in a fresh interpreter, like a new container would.
+The import report comes from `python -X importtime`; time to first render is
+the wall-clock time to import Streamlit's test harness and run the app script
+once. The upstream client libraries must not be imported on either path.
+
+Run from the repository root:
+    python -m benchmarks.bench_startup --max-import-ms 500 --max-render-ms 5000
+
+Exits with status 1 if a client library is imported at startup or a budget
+is exceeded.
+"""
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_MODULES = (
+    "utils.transcription", "utils.youtube_utils", "utils.pipeline", "utils.jobs",
+    "utils.batch", "utils.file_utils", "components.video_grid",
+)
+# Imported on first use only; loading any of them at startup is a regression
+DEFERRED_MODULES = ("youtube_transcript_api", "deep_translator", "pytubefix")
+
+_FIRST_RENDER = """
+import sys, time, json
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file(sys.argv[1], default_timeout=60)
+at.run()
+elapsed = time.perf_counter() - start
+print(json.dumps({'ms': elapsed * 1000, 'errors': [str(e.value) for e in at.exception],
+                  'modules': sorted(sys.modules)}))
+"""
+
+
+def _run(args, **kwargs) -> subprocess.CompletedProcess:
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    return subprocess.run([sys.executable] + args, cwd=ROOT, env=env, capture_output=True,
+                          text=True, check=True, **kwargs)
+
+
+def import_times(modules) -> dict:
+    """Return {module: (self_us, cumulative_us)} for one cold import of `modules`."""
+    proc = _run(["-X", "importtime", "-c", "import " + ", ".join(modules)])
+    times = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        times[name.strip()] = (int(self_us), int(cumulative_us))
+    return times
+
+
+def first_render() -> dict:
+    """Run the app once in a fresh interpreter and return timing, errors and loaded modules."""
+    proc = _run(["-c", _FIRST_RENDER, os.path.join(ROOT, "streamlit_app.py")])
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def deferred_loaded(modules) -> list:
+    """Return the deferred client libraries present among the imported module names."""
+    return sorted({name.split(".")[0] for name in modules} & set(DEFERRED_MODULES))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3, help="Fresh interpreters per measurement; medians are reported")
+    parser.add_argument("--top", type=int, default=10, help="Slowest imports to list")
+    parser.add_argument("--max-import-ms", type=float, default=None, help="Fail if importing the app modules is slower")
+    parser.add_argument("--max-render-ms", type=float, default=None, help="Fail if the first render is slower")
+    parser.add_argument("--skip-render", action="store_true", help="Only measure imports")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    runs = [import_times(APP_MODULES) for _ in range(args.runs)]
+    last = runs[-1]
+    # Self times add up to the whole import without counting nested imports twice
+    total_ms = statistics.median(sum(s for s, _ in times.values()) / 1000 for times in runs)
+    top = sorted(last.items(), key=lambda item: item[1][1], reverse=True)[:args.top]
+    results = {
+        'import_ms': round(total_ms, 1),
+        'slowest_imports': [{'module': name, 'self_ms': s / 1000, 'cumulative_ms': c / 1000}
+                            for name, (s, c) in top],
+        'deferred_imported': deferred_loaded(last),
+    }
+    if not args.skip_render:
+        renders = [first_render() for _ in range(args.runs)]
+        results['first_render_ms'] = round(statistics.median(r['ms'] for r in renders), 1)
+        results['render_errors'] = renders[-1]['errors']
+        results['deferred_imported'] = sorted(set(results['deferred_imported'])
+                                              | set(deferred_loaded(renders[-1]['modules'])))
+
+    failures = []
+    if results['deferred_imported']:
+        failures.append(f"client libraries imported at startup: {', '.join(results['deferred_imported'])}")
+    if results.get('render_errors'):
+        failures.append(f"app raised on first render: {results['render_errors'][0]}")
+    if args.max_import_ms is not None and results['import_ms'] > args.max_import_ms:
+        failures.append(f"imports took {results['import_ms']} ms, budget {args.max_import_ms} ms")
+    if args.max_render_ms is not None and results.get('first_render_ms', 0) > args.max_render_ms:
+        failures.append(f"first render took {results['first_render_ms']} ms, budget {args.max_render_ms} ms")
+    results['failures'] = failures
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"app module imports: {results['import_ms']:8.1f} ms (median of {args.runs})")
+        for entry in results['slowest_imports']:
+            print(f"  {entry['cumulative_ms']:8.1f} ms  {entry['module']}")
+        if 'first_render_ms' in results:
+            print(f"first render:       {results['first_render_ms']:8.1f} ms (median of {args.runs})")
+        for failure in failures:
+            print(f"regression: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
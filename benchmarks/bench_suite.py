@@ -0,0 +1,304 @@
+"""
+Offline end-to-end benchmark suite replaying recorded fixtures.
+
+Every scenario runs the app's real code paths (get_transcript, the
+transcription pipeline with search indexing, playlist loading and syncing,
+and ZIP export) against the stand-ins in benchmarks/fakes.py, with fresh
+in-memory caches, simulated latency and error rates, and reports throughput,
+p50/p99 latency and peak memory. Results are written as JSON so runs can be compared.
+Retry sleeps and circuit breaker timeouts are scaled by --retry-delay-scale.
+Exits with status 1 if a scenario that must complete, such as
+upstream_blip_200, loses any video.
+
+Run from the repository root:
+    python -m benchmarks.bench_suite --latency 0.05 --error-rate 0.01 -o results.json
+    python -m benchmarks.bench_suite --scenarios playlist_100 --baseline results.json
+"""
+import os
+import sys
+import json
+import time
+import logging
+import platform
+import argparse
+import subprocess
+import tracemalloc
+from typing import Callable, Dict, List
+from unittest import mock
+
+from benchmarks.fakes import Fixtures, Network, offline_upstreams
+from utils import cache, resilience, search, transcription, youtube_utils
+from utils.cache import TranscriptCache, TranslationMemo, MetadataCache, TrackListingCache, PlaylistSnapshotStore
+from utils.clients import playlist
+from utils.export import ZipExporter
+from utils.metrics import registry
+from utils.pipeline import run_pipeline
+from utils.rate_limit import TokenBucket
+from utils.youtube_utils import normalize_video_inputs, iter_video_metadata, sync_playlist
+
+DEFAULT_FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "sample.json")
+PLAYLIST_SIZES = (10, 100, 1000)
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile; 0.0 for no values."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(q * len(ordered) + 0.5)) - 1))]
+
+
+def single_video(video_id: str, source_lang: str, target_lang: str = None, repeat: int = 5) -> Callable:
+    """Scenario: fetch one video's transcript `repeat` times, each with cold caches."""
+    def run(fresh_caches) -> Dict:
+        latencies, failed = [], 0
+        for _ in range(repeat):
+            fresh_caches()
+            start = time.perf_counter()
+            try:
+                transcription.get_transcript(video_id, source_lang, target_lang)
+            except Exception:
+                failed += 1
+            latencies.append(time.perf_counter() - start)
+        return {'videos': repeat, 'failed': failed, 'latencies': latencies}
+    return run
+
+
+def playlist_run(size: int, source_lang: str, target_lang: str, fmt: str, workers: int) -> Callable:
+    """Scenario: load a playlist of `size` videos, transcribe all of them and export a ZIP."""
+    def run(fresh_caches) -> Dict:
+        fresh_caches()
+        phases = {}
+        start = time.perf_counter()
+        video_ids, _ = normalize_video_inputs(playlist(f"https://www.youtube.com/playlist?list=PLsynthetic{size}").video_urls)
+        titles = {vid: meta['title'] for vid, meta in iter_video_metadata(video_ids, max_workers=workers) if meta}
+        phases['load_playlist'] = time.perf_counter() - start
+
+        pipeline_start = time.perf_counter()
+        latencies, videos, failed = [], [], 0
+        for event in run_pipeline(video_ids, source_lang, target_lang,
+                                  format_fn=lambda video_id, transcript: transcript):
+            if event.error is not None:
+                failed += 1
+            elif event.stage == 'format':
+                latencies.append(time.perf_counter() - pipeline_start)
+                if event.result:
+                    videos.append({'id': event.video_id, 'transcript': event.result,
+                                   'filename': f"{titles.get(event.video_id, event.video_id)} [{event.video_id}].txt"})
+        phases['transcribe'] = time.perf_counter() - pipeline_start
+
+        export_start = time.perf_counter()
+        exporter = ZipExporter(fmt=fmt)
+        exporter.sync(videos)
+        archive = exporter.getvalue()
+        exporter.close()
+        phases['export'] = time.perf_counter() - export_start
+        return {'videos': len(video_ids), 'failed': failed, 'latencies': latencies,
+                'phases': phases, 'archive_bytes': len(archive)}
+    return run
+
+
+def playlist_resync(size: int, added: int, workers: int) -> Callable:
+    """Scenario: re-sync a playlist of `size` videos that gained `added` videos since its last sync."""
+    def run(fresh_caches) -> Dict:
+        fresh_caches()
+        store = cache.get_playlist_store()
+        # Synthetic playlists grow by appending ids, so the smaller one's snapshot stands in for the last sync
+        sync_playlist(f"PLsynthetic{size}", max_workers=workers)
+        last = store.get(f"PLsynthetic{size}")
+        store.put(f"PLsynthetic{size + added}", last['video_ids'], last['videos'])
+        # Metadata lookups after the first sync must come from the snapshot, not the cache
+        cache._metadata_cache = MetadataCache(":memory:")
+
+        start = time.perf_counter()
+        sync = sync_playlist(f"PLsynthetic{size + added}", max_workers=workers)
+        elapsed = time.perf_counter() - start
+        failed = len(sync.failed) + (len(sync.added) != added)
+        return {'videos': len(sync.videos) + len(sync.failed), 'failed': failed, 'latencies': [elapsed],
+                'phases': {'resync': elapsed}, 'added': len(sync.added)}
+    return run
+
+
+def upstream_blip(size: int, upstream: str, burst: int, workers: int) -> Callable:
+    """
+    Scenario: transcribe a playlist of `size` videos while the first `burst` calls to `upstream` fail.
+
+    The burst opens that upstream's circuit; every video must still be
+    transcribed once it closes, or the suite exits with status 1.
+    """
+    def run(fresh_caches) -> Dict:
+        fresh_caches()
+        start = time.perf_counter()
+        video_ids = [f"v{i:010d}" for i in range(size)]
+        latencies, failed = [], 0
+        for event in run_pipeline(video_ids, 'en', None, format_fn=lambda video_id, transcript: transcript,
+                                  fetch_workers=workers):
+            if event.error is not None:
+                failed += 1
+            elif event.stage == 'format':
+                latencies.append(time.perf_counter() - start)
+        return {'videos': size, 'failed': failed, 'latencies': latencies}
+    # Without latency the failures arrive back to back, before any success can close the circuit
+    run.network_overrides = {upstream: {'fail_first': burst, 'latency': 0.0}}
+    run.must_complete = True
+    return run
+
+
+def scenarios(args) -> Dict[str, Callable]:
+    table = {
+        'single_video': single_video('bench000001', 'en'),
+        'single_video_server_translation': single_video('bench000001', 'en', 'fr'),
+        'single_video_client_translation': single_video('bench000002', 'de', 'fr'),
+        'single_video_target_track': single_video('bench000003', 'en', 'fr'),
+    }
+    for size in PLAYLIST_SIZES:
+        table[f'playlist_{size}'] = playlist_run(size, 'en', args.target_lang, args.format, args.workers)
+    table['playlist_resync_1000'] = playlist_resync(1000, 10, args.workers)
+    table['upstream_blip_200'] = upstream_blip(200, 'transcript_list', resilience.BREAKER_FAILURE_THRESHOLD + 1,
+                                               args.workers)
+    return table
+
+
+def run_scenario(name: str, scenario: Callable, fixtures: Fixtures, args) -> Dict:
+    """Run one scenario under fresh caches, fixture-backed upstreams and memory tracing."""
+    def fresh_caches():
+        cache._transcript_cache = TranscriptCache(":memory:")
+        cache._translation_memo = TranslationMemo(":memory:")
+        cache._metadata_cache = MetadataCache(":memory:")
+        cache._track_listing_cache = TrackListingCache()
+        cache._playlist_store = PlaylistSnapshotStore(":memory:")
+        search._search_index = search.SearchIndex(":memory:")
+
+    network = Network(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                      throttle_rate=args.throttle_rate, seed=args.seed,
+                      overrides=getattr(scenario, 'network_overrides', None))
+    real_sleep = time.sleep
+    registry.reset()
+    with offline_upstreams(fixtures, network), \
+         mock.patch.object(cache, '_transcript_cache'), mock.patch.object(cache, '_translation_memo'), \
+         mock.patch.object(cache, '_metadata_cache'), mock.patch.object(cache, '_track_listing_cache'), \
+         mock.patch.object(cache, '_playlist_store'), mock.patch.object(search, '_search_index'), \
+         mock.patch.object(youtube_utils, 'metadata_rate_limiter', TokenBucket(args.rate, name='metadata')), \
+         mock.patch.object(transcription, 'translation_rate_limiter', TokenBucket(args.rate, name='translation')), \
+         mock.patch.object(resilience, 'concurrency_limiter', resilience.AdaptiveLimiter()), \
+         mock.patch.object(resilience, '_breakers', {}), \
+         mock.patch.object(resilience, 'BREAKER_RESET_SECONDS', resilience.BREAKER_RESET_SECONDS * args.retry_delay_scale), \
+         mock.patch.object(time, 'sleep', lambda seconds: real_sleep(seconds * args.retry_delay_scale)):
+        if args.memory:
+            tracemalloc.start()
+        start = time.perf_counter()
+        outcome = scenario(fresh_caches)
+        elapsed = time.perf_counter() - start
+        limit_end = resilience.concurrency_limiter.limit
+        peak = tracemalloc.get_traced_memory()[1] if args.memory else None
+        if args.memory:
+            tracemalloc.stop()
+
+    stages = {
+        h['labels'].get('stage'): {'count': h['count'], 'mean_s': h['mean'], 'p50_s_le': h['p50'], 'p99_s_le': h['p99']}
+        for h in registry.snapshot()['histograms'] if h['name'] == 'stage_seconds'
+    }
+    latencies = outcome.pop('latencies')
+    ok = outcome['videos'] - outcome['failed']
+    return dict(
+        outcome,
+        name=name,
+        elapsed_s=elapsed,
+        videos_per_second=ok / elapsed if elapsed else 0.0,
+        latency_p50_s=percentile(latencies, 0.50),
+        latency_p99_s=percentile(latencies, 0.99),
+        error_rate=outcome['failed'] / outcome['videos'] if outcome['videos'] else 0.0,
+        peak_memory_mb=peak / 1024 / 1024 if peak is not None else None,
+        concurrency_limit_end=limit_end,
+        upstream_calls=dict(network.calls),
+        upstream_failures=dict(network.failures),
+        stages=stages,
+    )
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(DEFAULT_FIXTURES)).stdout.strip()
+    except OSError:
+        return ""
+
+
+def compare(results: List[Dict], baseline_path: str):
+    """Print throughput and p99 changes against a previous results file."""
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = {entry['name']: entry for entry in json.load(f)['scenarios']}
+    print(f"\nversus {baseline_path}:")
+    for entry in results:
+        before = baseline.get(entry['name'])
+        if not before:
+            continue
+        speedup = entry['videos_per_second'] / before['videos_per_second'] if before['videos_per_second'] else 0.0
+        print(f"  {entry['name']:<34} throughput x{speedup:5.2f}  "
+              f"p99 {before['latency_p99_s'] * 1000:8.1f} -> {entry['latency_p99_s'] * 1000:8.1f} ms")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixtures", default=DEFAULT_FIXTURES)
+    parser.add_argument("--scenarios", nargs="+", help="Scenario names to run (default: all)")
+    parser.add_argument("--latency", type=float, default=0.02, help="Mean simulated seconds per upstream call")
+    parser.add_argument("--jitter", type=float, default=0.5, help="Latency spread as a fraction of the mean")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Probability an upstream call fails")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Probability an upstream call is throttled")
+    parser.add_argument("--rate", type=float, default=1000.0, help="Requests/s allowed by the shared rate limiters")
+    parser.add_argument("--retry-delay-scale", type=float, default=0.01, help="Multiplier applied to retry sleeps")
+    parser.add_argument("--target-lang", default="fr", help="Translation target for the playlist scenarios")
+    parser.add_argument("--format", default="srt", help="Export format for the playlist scenarios")
+    parser.add_argument("--workers", type=int, default=youtube_utils.DEFAULT_METADATA_WORKERS)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-memory", dest="memory", action="store_false",
+                        help="Skip tracemalloc, which slows allocation-heavy code")
+    parser.add_argument("--output", "-o", help="Write results as JSON to this file")
+    parser.add_argument("--baseline", help="Compare against an earlier results file")
+    parser.add_argument("--verbose", "-v", action="store_true", help="Show the app's log output")
+    args = parser.parse_args()
+    # Simulated failures would otherwise flood the output with error logs
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.CRITICAL)
+
+    fixtures = Fixtures.load(args.fixtures)
+    table = scenarios(args)
+    names = args.scenarios or list(table)
+    unknown = [name for name in names if name not in table]
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(unknown)} (choose from {', '.join(table)})")
+
+    results, incomplete = [], []
+    for name in names:
+        result = run_scenario(name, table[name], fixtures, args)
+        results.append(result)
+        memory = f"{result['peak_memory_mb']:7.1f} MB" if result['peak_memory_mb'] is not None else "      -"
+        print(f"{name:<34} {result['videos']:>5} videos {result['elapsed_s']:8.2f}s "
+              f"{result['videos_per_second']:8.1f}/s  p50 {result['latency_p50_s'] * 1000:8.1f} ms  "
+              f"p99 {result['latency_p99_s'] * 1000:8.1f} ms  errors {result['error_rate']:5.1%}  peak {memory}")
+        if getattr(table[name], 'must_complete', False) and result['failed']:
+            incomplete.append(f"{name}: {result['failed']} of {result['videos']} videos failed")
+
+    report = {
+        'meta': {
+            'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S"),
+            'commit': _git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'args': {key: value for key, value in vars(args).items() if key not in ('output', 'baseline')},
+        },
+        'scenarios': results,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    if args.baseline:
+        compare(results, args.baseline)
+    if incomplete:
+        print("FAIL: " + "; ".join(incomplete))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
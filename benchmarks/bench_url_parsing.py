@@ -0,0 +1,126 @@
+"""
+Benchmark bulk normalization of pasted video links over a synthetic corpus.
+
+The corpus mixes every supported URL shape, bare ids, duplicates, comments and
+invalid lines. Normalization must stay linear: the per-line cost at the
+largest size may not exceed the per-line cost at the smallest size by more
+than --max-ratio. Before timing, a fixed set of lines is normalized and
+checked against the expected ids.
+
+Run from the repository root:
+    python -m benchmarks.bench_url_parsing --sizes 10000 100000 --max-ratio 2
+
+Exits with status 1 if the scaling or normalization check fails.
+"""
+import sys
+import time
+import random
+import string
+import argparse
+
+from utils.youtube_utils import normalize_video_inputs
+
+SHAPES = (
+    "https://www.youtube.com/watch?v={id}",
+    "https://www.youtube.com/watch?v={id}&list=PL{list}&index={n}",
+    "https://youtube.com/watch?feature=share&v={id}&t={n}s",
+    "https://m.youtube.com/watch?v={id}",
+    "https://youtu.be/{id}?si={list}",
+    "https://www.youtube.com/shorts/{id}",
+    "https://www.youtube.com/embed/{id}?start={n}",
+    "https://www.youtube.com/live/{id}?feature=share",
+    "{id}",
+    "  {id}  ",
+)
+INVALID = ("https://example.com/watch?v=nope", "not a link", "https://www.youtube.com/channel/UC{list}")
+ID_CHARS = string.ascii_letters + string.digits + "-_"
+# Line -> expected video id, or None if the line must be reported as invalid
+NORMALIZATION_CASES = {
+    "dQw4w9WgXcQ": "dQw4w9WgXcQ",
+    "aBcDeFgHiJk": "aBcDeFgHiJk",
+    "https://youtu.be/abcdefghijk": "abcdefghijk",
+    "HTTPS://WWW.YOUTUBE.COM/watch?v=dQw4w9WgXcQ": "dQw4w9WgXcQ",
+    "https://www.youtube.com/watch?list=PLabcdefghij&v=dQw4w9WgXcQ": "dQw4w9WgXcQ",
+    "programming": None,
+    "performance": None,
+    "Performance": None,
+    "PERFORMANCE": None,
+    "https://example.com/watch?v=dQw4w9WgXcQ": None,
+}
+
+
+def synthetic_corpus(lines: int, seed: int = 0) -> list:
+    """Build `lines` input lines; about a fifth repeat earlier ids and a few are invalid."""
+    rng = random.Random(seed)
+    ids, corpus = [], []
+    for _ in range(lines):
+        roll = rng.random()
+        fields = {'list': "".join(rng.choices(ID_CHARS, k=16)), 'n': rng.randint(1, 500)}
+        if roll < 0.03:
+            corpus.append(rng.choice(INVALID).format(**fields))
+        elif roll < 0.05:
+            corpus.append(rng.choice(("", "# comment")))
+        else:
+            if ids and roll < 0.25:
+                video_id = rng.choice(ids)
+            else:
+                video_id = "".join(rng.choices(ID_CHARS, k=11))
+                ids.append(video_id)
+            corpus.append(rng.choice(SHAPES).format(id=video_id, **fields))
+    return corpus
+
+
+def check_normalization() -> list:
+    """Return a description of every NORMALIZATION_CASES line normalized wrongly."""
+    mismatches = []
+    for line, expected in NORMALIZATION_CASES.items():
+        video_ids, _ = normalize_video_inputs([line])
+        actual = video_ids[0] if video_ids else None
+        if actual != expected:
+            mismatches.append(f"{line!r}: expected {expected}, got {actual}")
+    return mismatches
+
+
+def best_of(fn, repeat: int) -> float:
+    """Return the fastest of `repeat` runs in seconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--max-ratio", type=float, default=2.0,
+                        help="Allowed growth of the per-line cost from the smallest to the largest size")
+    args = parser.parse_args()
+
+    mismatches = check_normalization()
+    for mismatch in mismatches:
+        print(f"normalization: {mismatch}")
+    if mismatches:
+        return 1
+
+    per_line = []
+    for size in sorted(args.sizes):
+        corpus = synthetic_corpus(size)
+        video_ids, invalid = normalize_video_inputs(corpus)
+        elapsed = best_of(lambda: normalize_video_inputs(corpus), args.repeat)
+        per_line.append(elapsed / size)
+        print(f"lines={size:>9}: {elapsed * 1000:9.1f} ms  {elapsed / size * 1e6:6.2f} us/line  "
+              f"{len(video_ids)} ids, {len(invalid)} invalid")
+
+    ratio = per_line[-1] / per_line[0]
+    print(f"per-line cost ratio (largest/smallest): {ratio:.2f}")
+    if ratio > args.max_ratio:
+        print(f"regression: normalization is not linear (ratio above {args.max_ratio})")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,211 @@
+"""
+Offline stand-ins for the upstream client libraries, replaying recorded fixtures.
+
+`offline_upstreams` installs fake `youtube_transcript_api`, `deep_translator`
+and `pytubefix` modules, so the app's own code paths run unchanged against
+fixture data with simulated latency and failures.
+
+Fixture format (see benchmarks/record_fixtures.py):
+    {
+      "videos": {"<video_id>": {"title": str, "length": int, "tracks": [
+          {"language_code": str, "is_generated": bool, "translation_languages": [str],
+           "segments": [{"text": str, "start": float, "duration": float}]}]}},
+      "translations": {"<target_lang>": {"<source text>": "<translated text>"}},
+      "playlists": {"<playlist_id>": ["<video_id>", ...]}
+    }
+
+Benchmarks usually ask for more videos than were recorded: any unknown video
+id replays one of the recorded videos, chosen by a hash of the id.
+"""
+import sys
+import json
+import types
+import random
+import threading
+import contextlib
+import zlib
+from typing import Dict, List, Optional
+from unittest import mock
+
+from utils import clients
+
+
+class UpstreamError(Exception):
+    """Simulated upstream failure."""
+
+
+class TooManyRequests(UpstreamError):
+    """Simulated throttling; named like the client libraries' own 429 errors."""
+
+
+class Network:
+    """
+    Simulated network conditions per upstream.
+
+    Each call waits a random latency around `latency` seconds (uniform within
+    +/- `jitter` of it), fails with probability `error_rate` and is throttled
+    with probability `throttle_rate`. Calls are counted per upstream.
+    `overrides` changes these per upstream; an override's `fail_first`
+    makes that many first calls fail, simulating a short outage.
+    """
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.5, error_rate: float = 0.0,
+                 throttle_rate: float = 0.0, seed: int = 0, overrides: Optional[Dict[str, Dict]] = None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.overrides = overrides or {}
+        self.calls: Dict[str, int] = {}
+        self.failures: Dict[str, int] = {}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def call(self, upstream: str):
+        settings = self.overrides.get(upstream, {})
+        latency = settings.get('latency', self.latency)
+        error_rate = settings.get('error_rate', self.error_rate)
+        throttle_rate = settings.get('throttle_rate', self.throttle_rate)
+        with self._lock:
+            self.calls[upstream] = self.calls.get(upstream, 0) + 1
+            delay = latency * (1 + self._random.uniform(-self.jitter, self.jitter)) if latency else 0.0
+            roll = self._random.random()
+            fail = roll < error_rate + throttle_rate or self.calls[upstream] <= settings.get('fail_first', 0)
+            if fail:
+                self.failures[upstream] = self.failures.get(upstream, 0) + 1
+        if delay:
+            threading.Event().wait(delay)
+        if fail and roll < throttle_rate:
+            raise TooManyRequests(f"simulated {upstream} throttling")
+        if fail:
+            raise UpstreamError(f"simulated {upstream} failure")
+
+
+class Fixtures:
+    """Recorded upstream responses."""
+
+    def __init__(self, data: Dict):
+        self.videos = data['videos']
+        self.translations = data.get('translations', {})
+        self.playlists = data.get('playlists', {})
+        self._recorded_ids = sorted(self.videos)
+
+    @classmethod
+    def load(cls, path: str) -> "Fixtures":
+        with open(path, encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def video(self, video_id: str) -> Dict:
+        """Return the recording for a video, replaying a recorded one for unknown ids."""
+        if video_id in self.videos:
+            return self.videos[video_id]
+        return self.videos[self._recorded_ids[zlib.crc32(video_id.encode()) % len(self._recorded_ids)]]
+
+    def playlist(self, playlist_id: str) -> List[str]:
+        """Return a recorded playlist, or a synthetic one for ids like 'PLsynthetic<count>'."""
+        if playlist_id in self.playlists:
+            return self.playlists[playlist_id]
+        digits = "".join(ch for ch in playlist_id if ch.isdigit())
+        size = int(digits) if digits else len(self._recorded_ids)
+        return [f"v{i:010d}" for i in range(size)]
+
+
+def _build_modules(fixtures: Fixtures, network: Network) -> Dict[str, types.ModuleType]:
+    """Create the fake library modules bound to the given fixtures and network."""
+
+    class TranslationLanguage:
+        def __init__(self, language_code: str):
+            self.language = language_code
+            self.language_code = language_code
+
+    class FakeTranscript:
+        def __init__(self, video_id: str, track: Dict, translated_to: Optional[str] = None):
+            self.video_id = video_id
+            self.language_code = translated_to or track['language_code']
+            self.language = self.language_code
+            self.is_generated = track['is_generated']
+            self.translation_languages = [] if translated_to else [
+                TranslationLanguage(code) for code in track.get('translation_languages', [])
+            ]
+            self._track = track
+            self._translated_to = translated_to
+
+        @property
+        def is_translatable(self) -> bool:
+            return bool(self.translation_languages)
+
+        def translate(self, language_code: str) -> "FakeTranscript":
+            if language_code not in [lang.language_code for lang in self.translation_languages]:
+                raise UpstreamError(f"track cannot be translated to {language_code}")
+            return FakeTranscript(self.video_id, self._track, translated_to=language_code)
+
+        def fetch(self) -> List[Dict]:
+            network.call('transcript_fetch')
+            segments = self._track['segments']
+            if self._translated_to:
+                table = fixtures.translations.get(self._translated_to, {})
+                return [dict(seg, text=table.get(seg['text'], f"[{self._translated_to}] {seg['text']}"))
+                        for seg in segments]
+            return [dict(seg) for seg in segments]
+
+    class FakeTranscriptList:
+        def __init__(self, video_id: str, tracks: List[FakeTranscript]):
+            self.video_id = video_id
+            self._tracks = tracks
+
+        def __iter__(self):
+            return iter(self._tracks)
+
+    class YouTubeTranscriptApi:
+        def list(self, video_id: str) -> FakeTranscriptList:
+            network.call('transcript_list')
+            recording = fixtures.video(video_id)
+            return FakeTranscriptList(video_id, [FakeTranscript(video_id, track) for track in recording['tracks']])
+
+    class GoogleTranslator:
+        def __init__(self, source: str = 'auto', target: str = 'en'):
+            self.source = source
+            self.target = target
+
+        def translate(self, text: str) -> str:
+            network.call('translate')
+            table = fixtures.translations.get(self.target, {})
+            return "\n".join(table.get(line, f"[{self.target}] {line}") for line in text.split("\n"))
+
+    class YouTube:
+        def __init__(self, url: str):
+            network.call('metadata')
+            self.video_id = url.split("v=")[1].split("&")[0]
+            recording = fixtures.video(self.video_id)
+            self.title = recording['title'] if self.video_id in fixtures.videos else f"{recording['title']} ({self.video_id})"
+            self.length = recording['length']
+
+    class Playlist:
+        def __init__(self, url: str):
+            network.call('playlist')
+            self.playlist_id = url.split("list=")[1].split("&")[0]
+
+        @property
+        def video_urls(self) -> List[str]:
+            return [f"https://www.youtube.com/watch?v={video_id}" for video_id in fixtures.playlist(self.playlist_id)]
+
+    transcript_api = types.ModuleType("youtube_transcript_api")
+    transcript_api.YouTubeTranscriptApi = YouTubeTranscriptApi
+    translator = types.ModuleType("deep_translator")
+    translator.GoogleTranslator = GoogleTranslator
+    pytube = types.ModuleType("pytubefix")
+    pytube.YouTube = YouTube
+    pytube.Playlist = Playlist
+    return {"youtube_transcript_api": transcript_api, "deep_translator": translator, "pytubefix": pytube}
+
+
+@contextlib.contextmanager
+def offline_upstreams(fixtures: Fixtures, network: Optional[Network] = None):
+    """Replace the upstream client libraries with fixture-backed stand-ins for the duration."""
+    network = network or Network()
+    modules = _build_modules(fixtures, network)
+    # Drop clients created from the real libraries before and after the swap
+    with mock.patch.dict(sys.modules, modules), \
+         mock.patch.object(clients, '_transcript_api', None), \
+         mock.patch.object(clients, '_translators', threading.local()):
+        yield network
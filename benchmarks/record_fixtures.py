@@ -0,0 +1,68 @@
+"""
+Record upstream responses into a fixture file for the offline benchmarks.
+
+Needs network access and the real client libraries. Records each video's
+title, length and every caption track with its segments; optionally the
+videos of playlists and Google translations of the first track's texts.
+
+Run from the repository root:
+    python -m benchmarks.record_fixtures VIDEO_ID [VIDEO_ID ...] \
+        --playlist PLAYLIST_ID --translate fr -o benchmarks/fixtures/recorded.json
+"""
+import sys
+import json
+import argparse
+
+from utils.clients import list_transcripts, get_translator, youtube, playlist
+from utils.transcription import process_transcript_segment
+from utils.youtube_utils import extract_video_id, watch_url
+
+
+def record_video(video_id: str) -> dict:
+    """Record metadata and all caption tracks of one video."""
+    yt = youtube(watch_url(video_id))
+    tracks = []
+    for track in list_transcripts(video_id):
+        codes = [option['language_code'] if isinstance(option, dict) else option.language_code
+                 for option in (track.translation_languages if track.is_translatable else [])]
+        tracks.append({
+            'language_code': track.language_code,
+            'is_generated': track.is_generated,
+            'translation_languages': codes,
+            'segments': [process_transcript_segment(entry) for entry in track.fetch()],
+        })
+    return {'title': yt.title, 'length': yt.length, 'tracks': tracks}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("videos", nargs="*", help="Video ids or URLs")
+    parser.add_argument("--playlist", action="append", default=[], help="Playlist id to record (repeatable)")
+    parser.add_argument("--translate", action="append", default=[], help="Target language to record (repeatable)")
+    parser.add_argument("--max-translations", type=int, default=200, help="Texts translated per language")
+    parser.add_argument("--output", "-o", required=True)
+    args = parser.parse_args()
+
+    data = {'videos': {}, 'translations': {}, 'playlists': {}}
+    for playlist_id in args.playlist:
+        urls = playlist(f"https://www.youtube.com/playlist?list={playlist_id}").video_urls
+        data['playlists'][playlist_id] = [extract_video_id(url) for url in urls]
+    for video in args.videos:
+        video_id = extract_video_id(video)
+        print(f"recording {video_id}", file=sys.stderr)
+        data['videos'][video_id] = record_video(video_id)
+
+    texts = [seg['text'] for video in data['videos'].values() if video['tracks']
+             for seg in video['tracks'][0]['segments']]
+    texts = list(dict.fromkeys(texts))[:args.max_translations]
+    for lang in args.translate:
+        translator = get_translator(lang)
+        data['translations'][lang] = {text: translator.translate(text) for text in texts}
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=1)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,53 @@
+"""Admin panel showing the app's in-process metrics."""
+import streamlit as st
+from utils.metrics import registry
+
+def show_metrics_panel():
+    """Render stage latencies, counters and cache gauges in the sidebar."""
+    with st.sidebar.expander("Metrics", expanded=False):
+        if not registry.enabled:
+            st.caption("Metrics are disabled (METRICS_ENABLED=0).")
+            return
+        snapshot = registry.snapshot()
+
+        st.markdown("**Stage latency (seconds)**")
+        stages = [
+            {
+                'stage': h['labels'].get('stage', h['name']),
+                'calls': h['count'],
+                'mean': round(h['mean'], 4),
+                'p50 ≤': h['p50'],
+                'p95 ≤': h['p95'],
+                'total': round(h['sum'], 3),
+            }
+            for h in snapshot['histograms'] if h['name'] == 'stage_seconds'
+        ]
+        if stages:
+            st.dataframe(stages, hide_index=True, use_container_width=True)
+        else:
+            st.caption("No instrumented calls yet.")
+
+        st.markdown("**Counters**")
+        counters = [
+            {'name': c['name'], 'labels': ", ".join(f"{k}={v}" for k, v in c['labels'].items()),
+             'value': round(c['value'], 3)}
+            for c in snapshot['counters']
+        ]
+        if counters:
+            st.dataframe(counters, hide_index=True, use_container_width=True)
+
+        st.markdown("**Caches and resolution paths**")
+        gauges = [{'name': name, 'value': round(value, 3)} for name, value in sorted(snapshot['gauges'].items())]
+        if gauges:
+            st.dataframe(gauges, hide_index=True, use_container_width=True)
+
+        col1, col2 = st.columns(2)
+        with col1:
+            st.download_button("Prometheus", registry.to_prometheus, file_name="metrics.prom",
+                               mime="text/plain", use_container_width=True)
+        with col2:
+            st.download_button("JSON", registry.to_json, file_name="metrics.json",
+                               mime="application/json", use_container_width=True)
+        if st.button("Reset metrics", use_container_width=True):
+            registry.reset()
+            st.rerun()
@@ -0,0 +1,41 @@
+"""Search panel over the transcripts indexed so far."""
+import re
+import streamlit as st
+from typing import Dict
+from components.video_grid import format_duration
+from utils.search import get_search_index
+from utils.youtube_utils import watch_url
+
+RESULTS_SHOWN = 50
+# Control characters cannot occur in captions, so they mark matches safely through escaping
+_MARK_OPEN, _MARK_CLOSE = "\x02", "\x03"
+_MARKDOWN_SPECIAL = re.compile(r"([\\`*_{}\[\]()#+\-.!|<>~$])")
+
+def _escape_markdown(text: str) -> str:
+    return _MARKDOWN_SPECIAL.sub(r"\\\1", text)
+
+def timestamp_url(video_id: str, start: float) -> str:
+    """Return the watch page URL starting playback at `start` seconds."""
+    return f"{watch_url(video_id)}&t={int(start)}s"
+
+def show_search_panel(titles: Dict[str, str]):
+    """Render a search box over indexed transcripts, linking each hit to its moment in the video."""
+    index = get_search_index()
+    if index is None or not index.stats()['documents']:
+        return
+
+    st.header("Search Transcripts")
+    query = st.text_input("Find where something was said:", key="search_query")
+    if not query.strip():
+        return
+    hits = index.search(query, limit=RESULTS_SHOWN, highlight=(_MARK_OPEN, _MARK_CLOSE))
+    if not hits:
+        st.caption("No matches.")
+        return
+
+    st.caption(f"{len(hits)} match(es)" if len(hits) < RESULTS_SHOWN else f"First {RESULTS_SHOWN} matches")
+    for hit in hits:
+        title = _escape_markdown(titles.get(hit['video_id'], hit['video_id']))
+        label = format_duration(int(hit['start']))
+        text = _escape_markdown(hit['highlighted']).replace(_MARK_OPEN, "**").replace(_MARK_CLOSE, "**")
+        st.markdown(f"[{title} @ {label}]({timestamp_url(hit['video_id'], hit['start'])}) — {text}")
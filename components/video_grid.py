@@ -1,76 +1,180 @@
+"""UI components for the YouTube transcription app."""
 import streamlit as st
 from typing import List, Set, Dict
 from datetime import timedelta
+from utils.youtube_utils import thumbnail_url
+
+PAGE_SIZES = (12, 24, 48, 96)
+DEFAULT_PAGE_SIZE = 24
+# 320x180 thumbnails are plenty for grid cards
+THUMBNAIL_QUALITY = 'mqdefault'
 
 def format_duration(seconds: int) -> str:
     """Format duration as HH:MM:SS or MM:SS."""
     return str(timedelta(seconds=seconds))[2:] if seconds < 3600 else str(timedelta(seconds=seconds))
 
-def show_video_grid(videos: List[Dict], selected_videos: Set[str], cols: int = 3):
+def _grid_cards(videos: List[Dict], playlist_id: str = "") -> List[Dict]:
+    """
+    Return precomputed render data for every video card.
+
+    Cached in session state for as long as the same playlist and videos are
+    shown, so reruns do not re-derive titles, durations and thumbnail URLs.
     """
-    Display videos in a responsive grid layout.
-    
+    signature = (playlist_id, hash(tuple((video['id'], video['title'], video['duration']) for video in videos)))
+    cached = st.session_state.get('_grid_cards')
+    if cached and cached[0] == signature:
+        return cached[1]
+    cards = [
+        {
+            'id': video['id'],
+            'title': video['title'][:57] + "..." if len(video['title']) > 60 else video['title'],
+            'title_lower': video['title'].lower(),
+            'duration': video['duration'] or 0,
+            'duration_label': format_duration(video['duration'] or 0),
+            'thumbnail_url': thumbnail_url(video['id'], THUMBNAIL_QUALITY),
+            'url': video['url'],
+        }
+        for video in videos
+    ]
+    st.session_state['_grid_cards'] = (signature, cards)
+    return cards
+
+@st.fragment
+def show_video_grid(videos: List[Dict], selected_videos: Set[str], cols: int = 3,
+                    page_size: int = DEFAULT_PAGE_SIZE, playlist_id: str = ""):
+    """
+    Display videos in a paginated, filterable grid layout.
+
+    Runs as a fragment, so Add/Remove clicks rerun only the grid, and only
+    the current page of cards is rendered.
+
     Args:
         videos: List of video metadata
         selected_videos: Set of selected video IDs
         cols: Number of grid columns
+        page_size: Default number of cards per page
+        playlist_id: ID of the playlist the videos belong to
     """
+    cards = _grid_cards(videos, playlist_id)
+    if not cards:
+        return
+
+    visible = _render_filters(cards)
+    _render_toolbar(visible, selected_videos)
+
+    # Pagination
+    col1, col2 = st.columns([1, 3])
+    with col1:
+        size = st.selectbox("Per page", PAGE_SIZES,
+                            index=PAGE_SIZES.index(page_size) if page_size in PAGE_SIZES else 0,
+                            key="grid_page_size")
+    page_count = max(1, -(-len(visible) // size))
+    if st.session_state.get('grid_page', 1) > page_count:
+        st.session_state['grid_page'] = page_count
+    with col2:
+        page = st.number_input(f"Page (of {page_count})", min_value=1, max_value=page_count, key="grid_page")
+    page_cards = visible[(page - 1) * size:page * size]
+
     # Calculate dimensions
     card_width = min(300, int(1200/cols))
     thumbnail_width = card_width - 20
 
     # Create grid
-    for i in range(0, len(videos), cols):
+    for i in range(0, len(page_cards), cols):
         with st.container():
             row = st.columns(cols)
-            for col_idx, video in enumerate(videos[i:i+cols]):
+            for col_idx, card in enumerate(page_cards[i:i+cols]):
                 if col_idx < len(row):
                     with row[col_idx]:
-                        _render_video_card(video, thumbnail_width, selected_videos)
+                        _render_video_card(card, thumbnail_width, selected_videos)
+
+def _render_filters(cards: List[Dict]) -> List[Dict]:
+    """Render title and duration filters and return the matching cards."""
+    longest = max(card['duration'] for card in cards)
+    max_minutes = max(1, -(-longest // 60))
+    col1, col2 = st.columns([3, 2])
+    with col1:
+        query = st.text_input("Filter by title", key="grid_filter_title").strip().lower()
+    with col2:
+        # Keyed by the range so a new playlist starts with the full range selected
+        low, high = st.slider("Duration (minutes)", 0, max_minutes, (0, max_minutes),
+                              key=f"grid_filter_duration_{max_minutes}")
+    if not query and low == 0 and high == max_minutes:
+        return cards
+    low, high = low * 60, high * 60
+    return [card for card in cards
+            if query in card['title_lower'] and low <= card['duration'] <= high]
+
+def _render_toolbar(visible: List[Dict], selected_videos: Set[str]):
+    """Render selection count and bulk selection controls for the filtered videos."""
+    st.caption(f"{len(visible)} shown, {len(selected_videos)} selected")
 
-def _render_video_card(video: Dict, width: int, selected_videos: Set[str]):
+    def select_all():
+        selected_videos.update(card['id'] for card in visible)
+
+    def clear_selection():
+        selected_videos.clear()
+
+    def select_range():
+        first = st.session_state['grid_range_from'] - 1
+        last = st.session_state['grid_range_to']
+        selected_videos.update(card['id'] for card in visible[first:last])
+
+    count = max(1, len(visible))
+    for key in ('grid_range_from', 'grid_range_to'):
+        if st.session_state.get(key, 1) > count:
+            st.session_state[key] = count
+
+    col1, col2, col3, col4, col5 = st.columns([2, 2, 1, 1, 2])
+    with col1:
+        st.button("Select all shown", on_click=select_all, use_container_width=True)
+    with col2:
+        st.button("Clear selection", on_click=clear_selection, disabled=not selected_videos,
+                  use_container_width=True)
+    with col3:
+        st.number_input("From #", min_value=1, max_value=count, key="grid_range_from")
+    with col4:
+        st.number_input("To #", min_value=1, max_value=count, key="grid_range_to")
+    with col5:
+        st.write("")
+        st.button("Select range", on_click=select_range, use_container_width=True)
+
+def _render_video_card(card: Dict, width: int, selected_videos: Set[str]):
     """Render individual video card."""
     with st.container():
         # Thumbnail
-        st.image(video['thumbnail_url'], width=width)
-        
+        st.image(card['thumbnail_url'], width=width)
+
         # Title
-        title = video['title'][:57] + "..." if len(video['title']) > 60 else video['title']
-        st.markdown(f"<h4 style='margin:5px 0;font-size:14px'>{title}</h4>", unsafe_allow_html=True)
-        
+        st.markdown(f"<h4 style='margin:5px 0;font-size:14px'>{card['title']}</h4>", unsafe_allow_html=True)
+
         # Duration and controls
         col1, col2 = st.columns([3, 2])
         with col1:
             st.markdown(
-                f"<p style='color:#606060;font-size:12px'>{format_duration(video['duration'])}</p>",
+                f"<p style='color:#606060;font-size:12px'>{card['duration_label']}</p>",
                 unsafe_allow_html=True
             )
         with col2:
-            _render_control_buttons(video, selected_videos)
-        
+            _render_control_buttons(card, selected_videos)
+
         # Preview button
-        st.link_button("▶ Preview", video['url'], use_container_width=True)
+        st.link_button("▶ Preview", card['url'], use_container_width=True)
 
 def _render_control_buttons(video: Dict, selected_videos: Set[str]):
     """Render Add/Remove buttons."""
     button_key = f"toggle_{video['id']}"
-    
-    # Initialize button state in session state if not exists
-    if button_key not in st.session_state:
-        st.session_state[button_key] = video['id'] in selected_videos
-    
+
     # Define callback functions
     def add_video():
         selected_videos.add(video['id'])
-        st.session_state[button_key] = True
-        
+
     def remove_video():
-        selected_videos.remove(video['id'])
-        st.session_state[button_key] = False
-    
+        selected_videos.discard(video['id'])
+
     if video['id'] in selected_videos:
         st.button(
-            "Remove", 
+            "Remove",
             key=f"{button_key}_remove",
             on_click=remove_video,
             type="secondary",
@@ -1,9 +1,27 @@
+import os
+import logging
 import streamlit as st
-from utils.file_utils import sanitize_filename, format_transcript_content, create_zip_content
-from utils.youtube_utils import extract_video_id, get_video_metadata
+from utils.file_utils import sanitize_filename
+from utils.formatters import FORMATS, render_transcript, filename_for_format
+from utils.export import ZipExporter, COMPRESSION_MODES
+from utils.youtube_utils import (
+    extract_video_id, normalize_video_inputs, get_video_metadata, get_videos_metadata, sync_playlist
+)
 from components.video_grid import show_video_grid
-from utils.transcription import get_transcript
-from typing import List, Dict, Set
+from components.metrics_panel import show_metrics_panel
+from components.search_panel import show_search_panel
+from utils.transcript import Transcript
+from utils.pipeline import STAGES
+from utils.jobs import Job, FAILED, get_job_manager
+from utils.metrics import serve_metrics
+from typing import List, Dict, Set, Tuple
+
+# The utils modules only create loggers; the entry points configure output
+logging.basicConfig(level=logging.INFO)
+
+# Prometheus scrape endpoint; one server per process, started on the first run
+if os.environ.get("METRICS_PORT"):
+    serve_metrics(int(os.environ["METRICS_PORT"]))
 
 # Initialize session states
 if 'selected_videos' not in st.session_state:
@@ -14,74 +32,177 @@ if 'processed_transcripts' not in st.session_state:
     st.session_state['processed_transcripts'] = {}
 if 'processed_videos' not in st.session_state:
     st.session_state['processed_videos'] = []
+if 'active_jobs' not in st.session_state:
+    st.session_state['active_jobs'] = []
+if 'job_notices' not in st.session_state:
+    st.session_state['job_notices'] = []
+
+JOB_POLL_SECONDS = 1.0
+# Invalid lines listed in the warning after a bulk paste or upload
+INVALID_LINES_SHOWN = 5
+SOURCE_LANGUAGES = ["fr", "en", "auto"]
+TARGET_LANGUAGES = ["", "fr", "en", "es", "de", "it"]
 
 def load_playlist():
-    """Load and process playlist videos."""
+    """Sync the playlist against its last snapshot, fetching metadata only for new videos."""
     playlist_url = st.session_state.get('playlist_url', '')
     if playlist_url:
         with st.spinner("Loading playlist videos..."):
             try:
-                from pytubefix import Playlist
-                playlist = Playlist(playlist_url)
-                videos = []
-                
                 progress_bar = st.progress(0)
-                for idx, video_url in enumerate(playlist.video_urls):
-                    video_id = extract_video_id(video_url)
-                    metadata = get_video_metadata(video_id)
-                    if metadata:
-                        videos.append(metadata)
-                    progress = (idx + 1) / len(playlist.video_urls)
-                    progress_bar.progress(progress)
+                sync = sync_playlist(playlist_url, progress=lambda done, total: progress_bar.progress(done / total))
+                progress_bar.progress(1.0)
+                
+                st.session_state['playlist_videos'] = sync.videos
+                st.session_state['playlist_id'] = sync.playlist_id
+                st.session_state['selected_videos'] -= set(sync.removed)
+                notices = st.session_state['job_notices']
+                if not sync.first_sync and (sync.added or sync.removed):
+                    notices.append(('info', f"Playlist updated: {len(sync.added)} new, {len(sync.removed)} removed"))
+                if sync.failed:
+                    notices.append(('warning', f"Could not load metadata for {len(sync.failed)} video(s)"))
                 
-                st.session_state['playlist_videos'] = videos
+                # Only videos added since an earlier sync are queued; a first load queues nothing
+                new_videos = [vid for vid in sync.added if vid not in sync.failed]
+                if st.session_state.get('auto_queue_new') and not sync.first_sync and new_videos:
+                    process_transcription(new_videos, st.session_state.get('source_lang', SOURCE_LANGUAGES[0]),
+                                          st.session_state.get('target_lang', TARGET_LANGUAGES[0]))
+                    notices.append(('info', f"Queued transcription of {len(new_videos)} new video(s)"))
                 st.rerun()
+            except ValueError:
+                st.error("Please provide a valid YouTube playlist link.")
             except Exception as e:
                 st.error(f"Failed to load playlist: {str(e)}")
 
+def _build_video_data(video_id: str, transcript: Transcript, metadata_index: Dict[str, Dict]) -> Dict:
+    """Package a transcript into downloadable video data; rendering is deferred to download."""
+    metadata = metadata_index.get(video_id) or get_video_metadata(video_id)
+    if not metadata:
+        raise Exception("Could not fetch video metadata")
+    return {
+        'id': video_id,
+        'title': metadata['title'],
+        'transcript': transcript,
+        'filename': f"{sanitize_filename(metadata['title'])}.txt"
+    }
+
 def process_transcription(video_ids: List[str], source_lang: str, target_lang: str):
-    """Process transcription for selected videos."""
+    """Queue transcription of the selected videos as a background job."""
     if not video_ids:
         st.warning("Please select videos to transcribe")
         return
 
-    progress_bar = st.progress(0)
-    newly_processed = []
+    processed_index = {v['id']: v for v in st.session_state['processed_videos']}
     
-    for idx, video_id in enumerate(video_ids):
-        try:
-            metadata = next(v for v in st.session_state['playlist_videos'] 
-                          if v['id'] == video_id)
-            st.write(f"Processing video: {metadata['title']}")
-            
-            # Check if already processed
-            existing = next((v for v in st.session_state['processed_videos'] 
-                           if v['id'] == video_id), None)
-            if existing:
-                newly_processed.append(existing)
-            else:
-                transcript = get_transcript(video_id, source_lang, target_lang)
-                if transcript:
-                    content = format_transcript_content(transcript)
-                    filename = f"{sanitize_filename(metadata['title'])}.txt"
-                    video_data = {
-                        'id': video_id,
-                        'title': metadata['title'],
-                        'content': content,
-                        'filename': filename
-                    }
-                    newly_processed.append(video_data)
-                    if video_data not in st.session_state['processed_videos']:
-                        st.session_state['processed_videos'].append(video_data)
-                else:
-                    st.warning(f"No transcript available for: {metadata['title']}")
-            
-            progress_bar.progress((idx + 1) / len(video_ids))
-        except Exception as e:
-            st.warning(f"Failed to process video {video_id}: {str(e)}")
+    # Already processed videos are reused; only the rest, and partial ones, go to the job queue
+    pending = [vid for vid in dict.fromkeys(video_ids)
+               if vid not in processed_index or processed_index[vid].get('partial')]
+    if pending:
+        job_id = get_job_manager().submit(pending, source_lang, target_lang)
+        if job_id not in st.session_state['active_jobs']:
+            st.session_state['active_jobs'].append(job_id)
+
+def _collect_job(job: Job):
+    """Move a finished job's transcripts into this session's processed videos."""
+    snapshot = job.snapshot()
+    metadata_index = {v['id']: v for v in st.session_state['playlist_videos']}
+    unknown = [vid for vid in job.video_ids if vid not in metadata_index]
+    if unknown:
+        metadata_index.update(
+            (vid, metadata) for vid, metadata in get_videos_metadata(unknown).items() if metadata
+        )
+    title = lambda vid: metadata_index.get(vid, {}).get('title', vid)
     
-    progress_bar.empty()
-    display_processed_videos()
+    notices = st.session_state['job_notices']
+    processed = st.session_state['processed_videos']
+    processed_ids = {v['id'] for v in processed if not v.get('partial')}
+    # Append in selection order regardless of completion order; a full result replaces a partial one
+    for video_id in job.video_ids:
+        if video_id in job.results and video_id not in processed_ids:
+            try:
+                video_data = _build_video_data(video_id, job.results[video_id], metadata_index)
+                processed[:] = [v for v in processed if v['id'] != video_id]
+                processed.append(video_data)
+                notices.append(('success', f"Transcript ready for: {title(video_id)}"))
+            except Exception as e:
+                notices.append(('warning', f"Failed to process video {video_id}: {str(e)}"))
+    for video_id, error in snapshot['errors'].items():
+        notices.append(('warning', f"Failed to process video {title(video_id)}: {error}"))
+        partial = job.partial_results.get(video_id)
+        if partial is not None and len(partial) and video_id not in processed_ids:
+            try:
+                video_data = _build_video_data(video_id, partial, metadata_index)
+            except Exception:
+                continue
+            video_data.update(title=f"{video_data['title']} (partial)", partial=True)
+            processed[:] = [v for v in processed if v['id'] != video_id]
+            processed.append(video_data)
+            notices.append(('info', f"The translated part of {title(video_id)} can be downloaded; "
+                                    f"transcribe it again to retry the rest"))
+    for video_id in snapshot['missing']:
+        notices.append(('warning', f"No transcript available for: {title(video_id)}"))
+    if snapshot['status'] == FAILED:
+        notices.append(('error', f"Transcription job failed: {snapshot['error']}"))
+
+def _show_chunk_progress(job: Job, chunks: Dict[str, Tuple[int, int]]):
+    """Show chunk progress of long videos being translated, with their translated part for download."""
+    titles = {v['id']: v['title'] for v in st.session_state['playlist_videos']}
+    fmt = st.session_state.get('download_format', next(iter(FORMATS)))
+    for video_id, (done, total) in chunks.items():
+        if total < 2:
+            continue
+        title = titles.get(video_id, video_id)
+        col1, col2 = st.columns([3, 1])
+        with col1:
+            st.progress(done / total, text=f"Translating {title}: {done}/{total} chunks")
+        with col2:
+            st.download_button(
+                label="📥 Partial",
+                data=lambda video_id=video_id: render_transcript(job.partial_transcript(video_id) or [], fmt),
+                file_name=filename_for_format(f"{sanitize_filename(title)} (partial).txt", fmt),
+                mime=FORMATS[fmt][1],
+                key=f"partial_{job.id}_{video_id}"
+            )
+
+@st.fragment(run_every=JOB_POLL_SECONDS)
+def show_active_jobs():
+    """Poll background jobs, showing per-stage progress until they finish."""
+    manager = get_job_manager()
+    finished = False
+    for job_id in list(st.session_state['active_jobs']):
+        job = manager.get(job_id)
+        if job is None:
+            st.session_state['active_jobs'].remove(job_id)
+            st.session_state['job_notices'].append(('warning', "A transcription job expired before it finished"))
+            finished = True
+            continue
+        if job.is_finished:
+            _collect_job(job)
+            st.session_state['active_jobs'].remove(job_id)
+            finished = True
+            continue
+        snapshot = job.snapshot()
+        total = snapshot['total']
+        st.write(f"Transcribing {total} video(s): {snapshot['completed']}/{total} done")
+        for stage in STAGES:
+            done = snapshot['stage_done'][stage]
+            st.progress(done / total, text=f"{stage.capitalize()}: {done}/{total}")
+        _show_chunk_progress(job, snapshot['chunks'])
+    if finished:
+        # Rerun the whole app so the download section picks up the new transcripts
+        st.rerun()
+
+def _show_job_notices():
+    """Show messages from finished jobs once."""
+    for level, message in st.session_state['job_notices']:
+        getattr(st, level)(message)
+    st.session_state['job_notices'] = []
+
+def _render_download(video: Dict, fmt: str) -> str:
+    """Render a processed video's transcript for download."""
+    if 'transcript' in video:
+        return render_transcript(video['transcript'], fmt)
+    return video['content']
 
 def display_processed_videos():
     """Display processed videos with appropriate download options."""
@@ -89,15 +210,18 @@ def display_processed_videos():
         return
         
     st.header("Download Transcripts")
+    fmt = st.selectbox("Transcript format:", list(FORMATS), key="download_format")
+    mime = FORMATS[fmt][1]
     
+    # Transcripts are only rendered when a download button is clicked
     # Single video - direct download
     if len(st.session_state['processed_videos']) == 1:
         video = st.session_state['processed_videos'][0]
         st.download_button(
             label="📥 Download Transcript",
-            data=video['content'],
-            file_name=video['filename'],
-            mime="text/plain",
+            data=lambda video=video: _render_download(video, fmt),
+            file_name=filename_for_format(video['filename'], fmt),
+            mime=mime,
             key=f"dl_{video['id']}"
         )
         
@@ -112,19 +236,30 @@ def display_processed_videos():
                 with col2:
                     st.download_button(
                         label="📥",
-                        data=video['content'],
-                        file_name=video['filename'],
-                        mime="text/plain",
-                        key=f"dl_{video['id']}_{hash(video['content'])}"
+                        data=lambda video=video: _render_download(video, fmt),
+                        file_name=filename_for_format(video['filename'], fmt),
+                        mime=mime,
+                        key=f"dl_{video['id']}"
                     )
         
-        # Add zip download option
+        # Add zip download option, reusing the archive built on earlier downloads
         st.divider()
-        zip_data, zip_name = create_zip_content(st.session_state['processed_videos'])
+        compression = st.selectbox("ZIP compression:", list(COMPRESSION_MODES), key="zip_compression")
+        exporter = st.session_state.get('zip_exporter')
+        if exporter is None or exporter.compression != compression or exporter.fmt != fmt:
+            if exporter is not None:
+                exporter.close()
+            exporter = st.session_state['zip_exporter'] = ZipExporter(compression=compression, fmt=fmt)
+        videos = list(st.session_state['processed_videos'])
+        
+        def build_zip() -> bytes:
+            exporter.sync(videos)
+            return exporter.getvalue()
+        
         st.download_button(
             label="📥 Download All Transcripts as ZIP",
-            data=zip_data,
-            file_name=zip_name,
+            data=build_zip,
+            file_name="transcripts.zip",
             mime="application/zip",
             key="download_all_zip",
             use_container_width=True
@@ -133,35 +268,17 @@ def display_processed_videos():
 def process_single_video(video_id: str, source_lang: str, target_lang: str):
     """Handle single video transcription."""
     try:
-        metadata = get_video_metadata(video_id)
+        metadata = next((v for v in st.session_state['playlist_videos'] if v['id'] == video_id), None) \
+            or get_video_metadata(video_id)
         if not metadata:
             raise Exception("Could not fetch video metadata")
-            
-        st.write(f"Processing video: {metadata['title']}")
         
         # Check if already processed
-        existing = next((v for v in st.session_state['processed_videos'] 
-                        if v['id'] == video_id), None)
-        if existing:
-            video_data = existing
+        if any(v['id'] == video_id and not v.get('partial') for v in st.session_state['processed_videos']):
+            st.success(f"Transcript ready for: {metadata['title']}")
         else:
-            transcript = get_transcript(video_id, source_lang, target_lang)
-            if transcript:
-                content = format_transcript_content(transcript)
-                filename = f"{sanitize_filename(metadata['title'])}.txt"
-                video_data = {
-                    'id': video_id,
-                    'title': metadata['title'],
-                    'content': content,
-                    'filename': filename
-                }
-                st.session_state['processed_videos'].append(video_data)
-            else:
-                st.warning(f"No transcript available for this video")
-                return
-        
-        display_processed_videos()
-        st.success(f"Transcript ready for: {metadata['title']}")
+            st.write(f"Processing video: {metadata['title']}")
+            process_transcription([video_id], source_lang, target_lang)
             
     except Exception as e:
         st.error(f"Failed to process video {video_id}: {str(e)}")
@@ -169,12 +286,19 @@ def process_single_video(video_id: str, source_lang: str, target_lang: str):
 # UI Layout
 st.title("YouTube Video Transcription App")
 
+# Admin panel; it can reset the process-wide metrics, so only the deployment can enable it
+if os.environ.get("METRICS_PANEL") == "1":
+    show_metrics_panel()
+
 # Input for video or playlist link
 st.header("Input Video or Playlist Link")
 link_type = st.radio("Select the type of link:", ["Single Video", "Multiple Videos", "Playlist"])
 
 if link_type == "Multiple Videos":
     link = st.text_area("Enter video links (one per line):", height=150)
+    uploaded_links = st.file_uploader("Or upload a text file of links (one per line):", type=["txt"])
+    if uploaded_links is not None:
+        link = "\n".join([link, uploaded_links.getvalue().decode('utf-8', errors='replace')])
 elif link_type == "Playlist":
     col1, col2 = st.columns([4, 1])
     with col1:
@@ -183,21 +307,13 @@ elif link_type == "Playlist":
         st.write("")
         if st.button("Load Playlist", type="primary"):
             load_playlist()
+    st.checkbox("Automatically transcribe videos added since the last load", key='auto_queue_new')
     
-    # Show playlist videos in grid
+    # Show playlist videos in grid; selection count and bulk controls live in the grid
     if st.session_state['playlist_videos']:
-        # Show selected count and clear selection button
-        col1, col2 = st.columns([3, 1])
-        with col1:
-            selected_count = len(st.session_state['selected_videos'])
-            st.subheader(f"Playlist Videos ({selected_count} selected)")
-        with col2:
-            if selected_count > 0 and st.button("Clear Selection"):
-                st.session_state['selected_videos'].clear()
-                st.rerun()
-        
-        # Display videos in grid
-        show_video_grid(st.session_state['playlist_videos'], st.session_state['selected_videos'])
+        st.subheader(f"Playlist Videos ({len(st.session_state['playlist_videos'])})")
+        show_video_grid(st.session_state['playlist_videos'], st.session_state['selected_videos'],
+                        playlist_id=st.session_state.get('playlist_id', ''))
 else:
     link = st.text_input("Enter the link:")
 
@@ -205,9 +321,9 @@ else:
 st.header("Language Options")
 col1, col2 = st.columns(2)
 with col1:
-    source_lang = st.selectbox("Source language:", ["fr", "en", "auto"])
+    source_lang = st.selectbox("Source language:", SOURCE_LANGUAGES, key='source_lang')
 with col2:
-    target_lang = st.selectbox("Target language (optional):", ["", "fr", "en", "es", "de", "it"])
+    target_lang = st.selectbox("Target language (optional):", TARGET_LANGUAGES, key='target_lang')
 
 # Process button
 if st.button("Start Transcription"):
@@ -215,10 +331,30 @@ if st.button("Start Transcription"):
         st.error("Please provide a video or playlist link.")
     else:
         if link_type == "Single Video":
-            video_id = extract_video_id(link)
-            process_single_video(video_id, source_lang, target_lang)
+            try:
+                video_id = extract_video_id(link)
+            except ValueError:
+                st.error("Please provide a valid YouTube video link or video ID.")
+            else:
+                process_single_video(video_id, source_lang, target_lang)
         elif link_type == "Multiple Videos":
-            video_ids = [extract_video_id(l) for l in link.splitlines() if l.strip()]
-            process_transcription(video_ids, source_lang, target_lang)
+            video_ids, invalid = normalize_video_inputs(link.splitlines())
+            if invalid:
+                shown = ", ".join(invalid[:INVALID_LINES_SHOWN]) + (", ..." if len(invalid) > INVALID_LINES_SHOWN else "")
+                st.warning(f"Skipped {len(invalid)} invalid line(s): {shown}")
+            if video_ids:
+                process_transcription(video_ids, source_lang, target_lang)
+            else:
+                st.error("No valid video links found.")
         elif link_type == "Playlist":
             process_transcription(list(st.session_state['selected_videos']), source_lang, target_lang)
+
+# Background jobs keep running across reruns; poll them while any are active
+if st.session_state['active_jobs']:
+    show_active_jobs()
+_show_job_notices()
+display_processed_videos()
+
+# Search every transcript indexed so far, including ones from earlier sessions
+titles = {v['id']: v['title'] for v in st.session_state['playlist_videos'] + st.session_state['processed_videos']}
+show_search_panel(titles)
@@ -0,0 +1,182 @@
+"""Headless batch transcription used by the command-line entry point."""
+import os
+import json
+import time
+import logging
+import tarfile
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from typing import List, Dict, Optional, Iterable, Tuple, NamedTuple
+from utils.file_utils import sanitize_filename
+from utils.formatters import FORMATS, DEFAULT_FORMAT, write_transcript
+from utils.transcription import get_transcript
+from utils.youtube_utils import extract_video_id, get_video_metadata, normalize_video_inputs
+from utils.clients import playlist
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_NAME = ".checkpoint.jsonl"
+
+
+class BatchResult(NamedTuple):
+    """Outcome of transcribing one video."""
+    video_id: str
+    ok: bool
+    segments: int = 0
+    filename: Optional[str] = None
+    category: Optional[str] = None
+    error: Optional[str] = None
+
+
+def failure_category(error: BaseException) -> str:
+    """Name the root cause of a failure, e.g. 'TranscriptsDisabled'."""
+    while error.__cause__ is not None:
+        error = error.__cause__
+    return type(error).__name__
+
+
+def _playlist_video_ids(playlist_id: str) -> List[str]:
+    """List the video ids of a playlist."""
+    return [extract_video_id(video_url)
+            for video_url in playlist(f"https://www.youtube.com/playlist?list={playlist_id}").video_urls]
+
+
+def expand_inputs(lines: Iterable[str]) -> Tuple[List[str], List[str]]:
+    """
+    Turn input lines into video ids, expanding playlists.
+
+    Lines may be video URLs, bare video ids, playlist URLs or bare playlist
+    ids. Blank lines and lines starting with '#' are ignored.
+
+    Returns:
+        Tuple of (video_ids in first-seen order without duplicates, invalid lines)
+    """
+    return normalize_video_inputs(lines, expand_playlist=_playlist_video_ids)
+
+
+def transcribe_to_file(video_id: str, out_dir: str, source_lang: str = 'en', target_lang: Optional[str] = None,
+                       fmt: str = DEFAULT_FORMAT, titles: bool = False) -> BatchResult:
+    """
+    Fetch one transcript and write it to out_dir.
+
+    Files are named by video id, or by title when `titles` is set. They are
+    written to a temporary name first, so an interrupted run never leaves a
+    truncated transcript behind.
+    """
+    try:
+        transcript = get_transcript(video_id, source_lang, target_lang)
+        if not transcript:
+            return BatchResult(video_id, False, category="NoTranscript", error="No transcript available")
+        stem = video_id
+        if titles:
+            metadata = get_video_metadata(video_id)
+            stem = f"{sanitize_filename(metadata['title'])} [{video_id}]"
+        filename = stem + FORMATS[fmt][0]
+        path = os.path.join(out_dir, filename)
+        with open(path + ".part", 'w', encoding='utf-8') as f:
+            write_transcript(transcript, f, fmt)
+        os.replace(path + ".part", path)
+        return BatchResult(video_id, True, segments=len(transcript), filename=filename)
+    except Exception as e:
+        return BatchResult(video_id, False, category=failure_category(e), error=str(e))
+
+
+class Checkpoint:
+    """Append-only JSON lines log of finished videos, used to resume interrupted runs."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def load(self) -> Dict[str, Dict]:
+        """Return the last recorded result for each video id."""
+        results = {}
+        if not os.path.exists(self.path):
+            return results
+        with open(self.path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # A run killed mid-write can leave a partial last line
+                    continue
+                results[entry['video_id']] = entry
+        return results
+
+    def record(self, result: BatchResult):
+        """Durably append one result."""
+        with self._lock, open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(result._asdict(), ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+
+def run_batch(video_ids: List[str], out_dir: str, source_lang: str = 'en', target_lang: Optional[str] = None,
+              fmt: str = DEFAULT_FORMAT, workers: int = 4, use_processes: bool = False, titles: bool = False,
+              retry_failed: bool = False, progress=None) -> Dict:
+    """
+    Transcribe many videos into out_dir, resuming from its checkpoint.
+
+    Args:
+        video_ids: YouTube video IDs
+        out_dir: Output directory; also holds the checkpoint file
+        source_lang: Source transcript language
+        target_lang: Optional translation language
+        fmt: Output format, one of the keys of FORMATS
+        workers: Number of concurrent workers
+        use_processes: Use a process pool instead of a thread pool
+        titles: Name files by video title (costs one metadata lookup per video)
+        retry_failed: Retry videos that failed in an earlier run
+        progress: Optional callable receiving each BatchResult as it completes
+    Returns:
+        Summary dictionary with counts, throughput and failures by category
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    checkpoint = Checkpoint(os.path.join(out_dir, CHECKPOINT_NAME))
+    previous = checkpoint.load()
+    todo = [vid for vid in video_ids
+            if vid not in previous or (retry_failed and not previous[vid]['ok'])]
+    skipped = len(video_ids) - len(todo)
+
+    done, segments, failures = 0, 0, Counter()
+    start = time.perf_counter()
+    pool_class = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+    if todo:
+        with pool_class(max_workers=max(1, min(workers, len(todo)))) as executor:
+            futures = [
+                executor.submit(transcribe_to_file, vid, out_dir, source_lang, target_lang, fmt, titles)
+                for vid in todo
+            ]
+            for future in as_completed(futures):
+                result = future.result()
+                checkpoint.record(result)
+                if result.ok:
+                    done += 1
+                    segments += result.segments
+                else:
+                    failures[result.category] += 1
+                if progress:
+                    progress(result)
+    elapsed = time.perf_counter() - start
+
+    return {
+        'total': len(video_ids),
+        'skipped': skipped,
+        'done': done,
+        'failed': sum(failures.values()),
+        'segments': segments,
+        'elapsed': elapsed,
+        'videos_per_second': done / elapsed if elapsed else 0.0,
+        'segments_per_second': segments / elapsed if elapsed else 0.0,
+        'failures': dict(failures),
+    }
+
+
+def pack_tarball(out_dir: str, tar_path: str):
+    """Pack the finished transcripts in out_dir into a gzip-compressed tarball."""
+    with tarfile.open(tar_path, 'w:gz') as tar:
+        for name in sorted(os.listdir(out_dir)):
+            if name == CHECKPOINT_NAME or name.endswith(".part"):
+                continue
+            tar.add(os.path.join(out_dir, name), arcname=name)
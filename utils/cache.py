@@ -0,0 +1,537 @@
+"""Persistent on-disk caches for transcripts, translations and video metadata, plus in-process caches."""
+import os
+import json
+import zlib
+import time
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, List, Dict, Optional, Union
+from utils.transcript import Transcript
+from utils.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "transcription_app", "transcripts.sqlite3")
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+DEFAULT_TTL_SECONDS = 30 * 24 * 3600
+
+# Raw (untranslated) transcripts are stored with an empty target language
+RAW = ""
+
+
+class TranscriptCache:
+    """
+    SQLite-backed transcript cache with LRU and TTL eviction.
+
+    Entries are keyed by (video_id, source_lang, target_lang). The fetched
+    source transcript is stored under an empty target language, so a
+    translation to a new language reuses it instead of refetching.
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, max_bytes: int = DEFAULT_MAX_BYTES,
+                 ttl: Optional[float] = DEFAULT_TTL_SECONDS):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS transcripts ("
+                " video_id TEXT NOT NULL, source_lang TEXT NOT NULL, target_lang TEXT NOT NULL,"
+                " payload BLOB NOT NULL, size INTEGER NOT NULL,"
+                " created REAL NOT NULL, accessed REAL NOT NULL,"
+                " PRIMARY KEY (video_id, source_lang, target_lang))"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_transcripts_accessed ON transcripts (accessed)")
+
+    def get(self, video_id: str, source_lang: str, target_lang: Optional[str] = None) -> Optional[Transcript]:
+        """Return the cached transcript, or None on a miss or expired entry."""
+        key = (video_id, source_lang or "", target_lang or RAW)
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT payload, created FROM transcripts"
+                " WHERE video_id = ? AND source_lang = ? AND target_lang = ?", key
+            ).fetchone()
+            if row is not None and self.ttl is not None and now - row[1] > self.ttl:
+                self._conn.execute(
+                    "DELETE FROM transcripts WHERE video_id = ? AND source_lang = ? AND target_lang = ?", key
+                )
+                self.evictions += 1
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE transcripts SET accessed = ?"
+                " WHERE video_id = ? AND source_lang = ? AND target_lang = ?", (now,) + key
+            )
+            self.hits += 1
+        data = zlib.decompress(row[0])
+        if Transcript.is_serialized(data):
+            return Transcript.from_bytes(data)
+        # Entries written before the columnar format were JSON lists of segments
+        return Transcript.from_segments(json.loads(data))
+
+    def put(self, video_id: str, source_lang: str, target_lang: Optional[str],
+            transcript: Union[Transcript, List[Dict]]):
+        """Store a transcript and evict least recently used entries above the size limit."""
+        payload = zlib.compress(Transcript.coerce(transcript).to_bytes())
+        if len(payload) > self.max_bytes:
+            logger.warning(f"Transcript for {video_id} exceeds the cache size limit, not caching")
+            return
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO transcripts VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (video_id, source_lang or "", target_lang or RAW, payload, len(payload), now, now)
+            )
+            self._evict(now)
+
+    def _evict(self, now: float):
+        """Drop expired entries, then least recently used ones until under the size limit."""
+        if self.ttl is not None:
+            cursor = self._conn.execute("DELETE FROM transcripts WHERE created < ?", (now - self.ttl,))
+            self.evictions += cursor.rowcount
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM transcripts").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for rowid, size in self._conn.execute(
+            "SELECT rowid, size FROM transcripts ORDER BY accessed"
+        ).fetchall():
+            self._conn.execute("DELETE FROM transcripts WHERE rowid = ?", (rowid,))
+            self.evictions += 1
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def clear(self):
+        """Remove every cached transcript."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM transcripts")
+
+    def stats(self) -> Dict:
+        """Return hit/miss counters and current cache usage."""
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM transcripts"
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'entries': entries,
+            'bytes': size,
+        }
+
+
+_transcript_cache = None
+_cache_lock = threading.Lock()
+
+def get_transcript_cache() -> TranscriptCache:
+    """
+    Return the process-wide transcript cache.
+
+    Configured through TRANSCRIPT_CACHE_PATH, TRANSCRIPT_CACHE_MAX_MB and
+    TRANSCRIPT_CACHE_TTL_DAYS environment variables.
+    """
+    global _transcript_cache
+    with _cache_lock:
+        if _transcript_cache is None:
+            _transcript_cache = TranscriptCache(
+                path=os.environ.get("TRANSCRIPT_CACHE_PATH", DEFAULT_CACHE_PATH),
+                max_bytes=int(float(os.environ.get("TRANSCRIPT_CACHE_MAX_MB", DEFAULT_MAX_BYTES / 2**20)) * 2**20),
+                ttl=float(os.environ.get("TRANSCRIPT_CACHE_TTL_DAYS", DEFAULT_TTL_SECONDS / 86400)) * 86400,
+            )
+        return _transcript_cache
+
+
+DEFAULT_MEMO_PATH = os.path.join(os.path.expanduser("~"), ".cache", "transcription_app", "translations.sqlite3")
+DEFAULT_MEMO_MAX_ENTRIES = 500_000
+
+# SQLite limits the number of bound parameters per statement
+_SQL_CHUNK = 500
+
+
+class TranslationMemo:
+    """
+    SQLite-backed memo of translated segment texts keyed by (text, target_lang).
+
+    Captions repeat the same short phrases within and across videos, so
+    each distinct text only needs to be translated once per language.
+    Least recently used entries are evicted above `max_entries`.
+    """
+
+    def __init__(self, path: str = DEFAULT_MEMO_PATH, max_entries: int = DEFAULT_MEMO_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.chars_served = 0
+        self.chars_sent = 0
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS translations ("
+                " text TEXT NOT NULL, target_lang TEXT NOT NULL, translation TEXT NOT NULL,"
+                " accessed REAL NOT NULL, PRIMARY KEY (text, target_lang))"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_translations_accessed ON translations (accessed)")
+
+    def get_many(self, texts: List[str], target_lang: str) -> Dict[str, str]:
+        """Return the memoized translations for whichever of `texts` are known."""
+        unique = list(dict.fromkeys(texts))
+        found = {}
+        now = time.time()
+        with self._lock, self._conn:
+            for i in range(0, len(unique), _SQL_CHUNK):
+                chunk = unique[i:i + _SQL_CHUNK]
+                marks = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT text, translation FROM translations WHERE target_lang = ? AND text IN ({marks})",
+                    [target_lang] + chunk
+                ).fetchall()
+                found.update(rows)
+                if rows:
+                    hit_marks = ",".join("?" * len(rows))
+                    self._conn.execute(
+                        f"UPDATE translations SET accessed = ? WHERE target_lang = ? AND text IN ({hit_marks})",
+                        [now, target_lang] + [text for text, _ in rows]
+                    )
+            self.hits += len(found)
+            self.misses += len(unique) - len(found)
+            self.chars_served += sum(len(text) for text in found)
+        return found
+
+    def put_many(self, translations: Dict[str, str], target_lang: str):
+        """Memoize freshly translated texts and evict the oldest entries above the limit."""
+        if not translations:
+            return
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO translations VALUES (?, ?, ?, ?)",
+                [(text, target_lang, translated, now) for text, translated in translations.items()]
+            )
+            self.chars_sent += sum(len(text) for text in translations)
+            excess = self._conn.execute("SELECT COUNT(*) FROM translations").fetchone()[0] - self.max_entries
+            if excess > 0:
+                self._conn.execute(
+                    "DELETE FROM translations WHERE rowid IN"
+                    " (SELECT rowid FROM translations ORDER BY accessed LIMIT ?)", (excess,)
+                )
+
+    def clear(self):
+        """Remove every memoized translation."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM translations")
+
+    def stats(self) -> Dict:
+        """Return memo hit counters and characters sent versus served from the memo."""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'chars_sent': self.chars_sent,
+            'chars_served': self.chars_served,
+            'entries': entries,
+        }
+
+
+_translation_memo = None
+
+def get_translation_memo() -> TranslationMemo:
+    """
+    Return the process-wide translation memo.
+
+    Configured through TRANSLATION_MEMO_PATH and TRANSLATION_MEMO_MAX_ENTRIES
+    environment variables.
+    """
+    global _translation_memo
+    with _cache_lock:
+        if _translation_memo is None:
+            _translation_memo = TranslationMemo(
+                path=os.environ.get("TRANSLATION_MEMO_PATH", DEFAULT_MEMO_PATH),
+                max_entries=int(os.environ.get("TRANSLATION_MEMO_MAX_ENTRIES", DEFAULT_MEMO_MAX_ENTRIES)),
+            )
+        return _translation_memo
+
+
+DEFAULT_METADATA_PATH = os.path.join(os.path.expanduser("~"), ".cache", "transcription_app", "metadata.sqlite3")
+DEFAULT_METADATA_TTL_SECONDS = 7 * 24 * 3600
+
+
+class MetadataCache:
+    """
+    SQLite-backed cache of the video metadata fields that need a network call.
+
+    Only fields that cannot be derived from the video id (title, duration)
+    are stored. Entries older than `ttl` seconds are treated as misses.
+    """
+
+    def __init__(self, path: str = DEFAULT_METADATA_PATH, ttl: Optional[float] = DEFAULT_METADATA_TTL_SECONDS):
+        self.path = path
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS metadata ("
+                " video_id TEXT PRIMARY KEY, payload TEXT NOT NULL, fetched REAL NOT NULL)"
+            )
+
+    def get_many(self, video_ids: List[str]) -> Dict[str, Dict]:
+        """Return cached fields for whichever of `video_ids` are known and fresh."""
+        unique = list(dict.fromkeys(video_ids))
+        oldest = time.time() - self.ttl if self.ttl is not None else float("-inf")
+        found = {}
+        with self._lock:
+            for i in range(0, len(unique), _SQL_CHUNK):
+                chunk = unique[i:i + _SQL_CHUNK]
+                marks = ",".join("?" * len(chunk))
+                for video_id, payload, fetched in self._conn.execute(
+                    f"SELECT video_id, payload, fetched FROM metadata WHERE video_id IN ({marks})", chunk
+                ):
+                    if fetched >= oldest:
+                        found[video_id] = json.loads(payload)
+            self.hits += len(found)
+            self.misses += len(unique) - len(found)
+        return found
+
+    def get(self, video_id: str) -> Optional[Dict]:
+        """Return cached fields for one video, or None."""
+        return self.get_many([video_id]).get(video_id)
+
+    def put_many(self, fields: Dict[str, Dict]):
+        """Store fetched fields keyed by video id."""
+        if not fields:
+            return
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO metadata VALUES (?, ?, ?)",
+                [(video_id, json.dumps(values, ensure_ascii=False), now) for video_id, values in fields.items()]
+            )
+
+    def clear(self):
+        """Remove every cached entry."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM metadata")
+
+    def stats(self) -> Dict:
+        """Return hit/miss counters and the number of cached videos."""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM metadata").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'entries': entries,
+        }
+
+
+_metadata_cache = None
+
+def get_metadata_cache() -> MetadataCache:
+    """
+    Return the process-wide metadata cache.
+
+    Configured through METADATA_CACHE_PATH and METADATA_CACHE_TTL_HOURS
+    environment variables.
+    """
+    global _metadata_cache
+    with _cache_lock:
+        if _metadata_cache is None:
+            _metadata_cache = MetadataCache(
+                path=os.environ.get("METADATA_CACHE_PATH", DEFAULT_METADATA_PATH),
+                ttl=float(os.environ.get("METADATA_CACHE_TTL_HOURS", DEFAULT_METADATA_TTL_SECONDS / 3600)) * 3600,
+            )
+        return _metadata_cache
+
+
+DEFAULT_LISTING_TTL_SECONDS = 10 * 60
+DEFAULT_LISTING_MAX_ENTRIES = 1024
+
+
+class TrackListingCache:
+    """
+    In-process LRU cache of the caption track listing of each video.
+
+    A listing holds live client objects and caption URLs that expire, so it
+    is kept in memory for a short `ttl` only. It lets retries and later
+    stages reuse one listing instead of asking YouTube again.
+    """
+
+    def __init__(self, ttl: float = DEFAULT_LISTING_TTL_SECONDS, max_entries: int = DEFAULT_LISTING_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, video_id: str) -> Optional[Any]:
+        """Return the cached listing for a video, or None if missing or expired."""
+        with self._lock:
+            entry = self._entries.get(video_id)
+            if entry is None or entry[0] < time.monotonic() - self.ttl:
+                self._entries.pop(video_id, None)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(video_id)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, video_id: str, listing: Any):
+        """Store a listing, evicting the least recently used ones past `max_entries`."""
+        with self._lock:
+            self._entries[video_id] = (time.monotonic(), listing)
+            self._entries.move_to_end(video_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Remove every cached listing."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        """Return hit/miss counters and the number of cached listings."""
+        with self._lock:
+            entries = len(self._entries)
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'entries': entries,
+        }
+
+
+_track_listing_cache = None
+
+def get_track_listing_cache() -> TrackListingCache:
+    """
+    Return the process-wide track listing cache.
+
+    Configured through the TRACK_LISTING_TTL_MINUTES environment variable.
+    """
+    global _track_listing_cache
+    with _cache_lock:
+        if _track_listing_cache is None:
+            _track_listing_cache = TrackListingCache(
+                ttl=float(os.environ.get("TRACK_LISTING_TTL_MINUTES", DEFAULT_LISTING_TTL_SECONDS / 60)) * 60,
+            )
+        return _track_listing_cache
+
+
+DEFAULT_PLAYLIST_PATH = os.path.join(os.path.expanduser("~"), ".cache", "transcription_app", "playlists.sqlite3")
+
+
+class PlaylistSnapshotStore:
+    """
+    SQLite-backed store of the last synced state of each playlist.
+
+    A snapshot holds the playlist's video ids in order and, per video, the
+    metadata fields and a hash of them, so a re-sync can tell which videos
+    were added, removed or changed without refetching the known ones.
+    """
+
+    def __init__(self, path: str = DEFAULT_PLAYLIST_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS playlists ("
+                " playlist_id TEXT PRIMARY KEY, payload TEXT NOT NULL, synced REAL NOT NULL)"
+            )
+
+    def get(self, playlist_id: str) -> Optional[Dict]:
+        """
+        Return the snapshot of a playlist, or None if it was never synced.
+
+        The snapshot is {'video_ids': [...], 'videos': {video_id: {'fields': {...}, 'hash': str}},
+        'synced': timestamp}.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload, synced FROM playlists WHERE playlist_id = ?", (playlist_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        snapshot = json.loads(row[0])
+        snapshot['synced'] = row[1]
+        return snapshot
+
+    def put(self, playlist_id: str, video_ids: List[str], videos: Dict[str, Dict]):
+        """Replace a playlist's snapshot."""
+        payload = json.dumps({'video_ids': video_ids, 'videos': videos}, ensure_ascii=False)
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO playlists VALUES (?, ?, ?)", (playlist_id, payload, time.time()))
+
+    def delete(self, playlist_id: str):
+        """Forget a playlist."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM playlists WHERE playlist_id = ?", (playlist_id,))
+
+    def stats(self) -> Dict:
+        """Return the number of stored playlists."""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM playlists").fetchone()[0]
+        return {'entries': entries}
+
+
+_playlist_store = None
+
+def get_playlist_store() -> PlaylistSnapshotStore:
+    """
+    Return the process-wide playlist snapshot store.
+
+    Configured through the PLAYLIST_SNAPSHOT_PATH environment variable.
+    """
+    global _playlist_store
+    with _cache_lock:
+        if _playlist_store is None:
+            _playlist_store = PlaylistSnapshotStore(path=os.environ.get("PLAYLIST_SNAPSHOT_PATH", DEFAULT_PLAYLIST_PATH))
+        return _playlist_store
+
+def cache_gauges() -> Dict[str, float]:
+    """Return the counters and sizes of the process-wide caches that have been opened."""
+    gauges = {}
+    for name, cache in (('transcript_cache', _transcript_cache), ('translation_memo', _translation_memo),
+                        ('metadata_cache', _metadata_cache), ('track_listing_cache', _track_listing_cache),
+                        ('playlist_store', _playlist_store)):
+        if cache is not None:
+            gauges.update((f"{name}_{key}", value) for key, value in cache.stats().items())
+    return gauges
+
+
+registry.register_collector(cache_gauges)
@@ -0,0 +1,60 @@
+"""
+Process-wide clients for the upstream services.
+
+The client libraries are slow to import, so they are imported on first use
+rather than when the app or the utils modules load. Clients that keep
+connection state are created once per process and shared.
+"""
+import threading
+
+_lock = threading.Lock()
+_transcript_api = None
+_translators = threading.local()
+
+
+def get_transcript_api():
+    """Return the shared YouTubeTranscriptApi client, importing the library on first use."""
+    global _transcript_api
+    with _lock:
+        if _transcript_api is None:
+            from youtube_transcript_api import YouTubeTranscriptApi
+            # 1.x clients are instances holding an HTTP session; older releases only have static methods
+            _transcript_api = YouTubeTranscriptApi() if hasattr(YouTubeTranscriptApi, 'list') else YouTubeTranscriptApi
+        return _transcript_api
+
+
+def list_transcripts(video_id: str):
+    """List the transcript tracks of a video with the shared client."""
+    api = get_transcript_api()
+    if hasattr(api, 'list'):
+        return api.list(video_id)
+    return api.list_transcripts(video_id)
+
+
+def get_translator(target_lang: str, source_lang: str = 'auto'):
+    """
+    Return a GoogleTranslator for the language pair.
+
+    Translators keep per-request state, so each thread gets its own and
+    reuses it for later calls.
+    """
+    cache = getattr(_translators, 'by_pair', None)
+    if cache is None:
+        cache = _translators.by_pair = {}
+    key = (source_lang, target_lang)
+    if key not in cache:
+        from deep_translator import GoogleTranslator
+        cache[key] = GoogleTranslator(source=source_lang, target=target_lang)
+    return cache[key]
+
+
+def youtube(url: str):
+    """Return a pytubefix YouTube object for a watch URL."""
+    from pytubefix import YouTube
+    return YouTube(url)
+
+
+def playlist(url: str):
+    """Return a pytubefix Playlist object for a playlist URL."""
+    from pytubefix import Playlist
+    return Playlist(url)
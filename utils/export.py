@@ -0,0 +1,122 @@
+"""Incremental ZIP export of processed transcripts."""
+import hashlib
+import tempfile
+import threading
+import zipfile
+from typing import List, Dict
+from utils.formatters import DEFAULT_FORMAT, FORMATS, render_transcript, filename_for_format
+from utils.metrics import timed, count
+
+SPOOL_THRESHOLD = 8 * 1024 * 1024
+
+# Compression choices: (zipfile method, compresslevel)
+COMPRESSION_MODES = {
+    'fast': (zipfile.ZIP_DEFLATED, 1),
+    'deflate': (zipfile.ZIP_DEFLATED, 6),
+    'stored': (zipfile.ZIP_STORED, None),
+}
+DEFAULT_COMPRESSION = 'fast'
+
+
+def content_hash(content: str) -> str:
+    """Return a short digest identifying transcript content."""
+    return hashlib.blake2b(content.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def video_digest(video: Dict) -> str:
+    """Return a digest of a processed video's transcript, rendered or not."""
+    if 'transcript' in video:
+        return video['transcript'].digest()
+    return content_hash(video['content'])
+
+
+class ZipExporter:
+    """
+    ZIP archive of transcripts that is built incrementally and reused across reruns.
+
+    The archive is spooled in memory and rolls over to a temporary file once
+    it grows past `spool_threshold`. `sync` only compresses transcripts that
+    were not already in the archive; the archive is rebuilt from scratch only
+    when a video was removed or its content changed. Videos carrying a
+    'transcript' are rendered in `fmt` only as they are added.
+    """
+
+    def __init__(self, compression: str = DEFAULT_COMPRESSION, spool_threshold: int = SPOOL_THRESHOLD,
+                 fmt: str = DEFAULT_FORMAT):
+        if compression not in COMPRESSION_MODES:
+            raise ValueError(f"Unknown compression mode: {compression}")
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown transcript format: {fmt}")
+        self.compression = compression
+        self.fmt = fmt
+        self.spool_threshold = spool_threshold
+        self._entries = {}
+        self._file = None
+        self._lock = threading.Lock()
+
+    @timed('zip_sync')
+    def sync(self, videos: List[Dict]) -> bool:
+        """
+        Bring the archive up to date with the processed videos.
+
+        Args:
+            videos: List of processed video data
+        Returns:
+            True if the archive changed
+        """
+        wanted = {video['id']: video_digest(video) for video in videos}
+        with self._lock:
+            if self._file is not None and wanted == self._entries:
+                return False
+            if self._file is None or any(wanted.get(vid) != digest for vid, digest in self._entries.items()):
+                self._reset()
+            new_videos = [video for video in videos if video['id'] not in self._entries]
+            self._append(new_videos, wanted)
+            return True
+
+    def _reset(self):
+        if self._file is not None:
+            self._file.close()
+        self._file = tempfile.SpooledTemporaryFile(max_size=self.spool_threshold)
+        self._entries = {}
+        # Start from a valid empty archive so later appends can reopen it
+        zipfile.ZipFile(self._file, 'w').close()
+
+    def _append(self, videos: List[Dict], digests: Dict[str, str]):
+        method, level = COMPRESSION_MODES[self.compression]
+        self._file.seek(0)
+        with zipfile.ZipFile(self._file, 'a', method, compresslevel=level) as zip_file:
+            for video in videos:
+                if 'transcript' in video:
+                    name = filename_for_format(video['filename'], self.fmt)
+                    content = render_transcript(video['transcript'], self.fmt)
+                else:
+                    name, content = video['filename'], video['content']
+                zip_file.writestr(name, content)
+                self._entries[video['id']] = digests[video['id']]
+
+    def getvalue(self) -> bytes:
+        """Return the archive bytes."""
+        with self._lock:
+            if self._file is None:
+                self._reset()
+            self._file.seek(0)
+            content = self._file.read()
+        count("output_bytes", len(content), stage='zip_export')
+        return content
+
+    def size(self) -> int:
+        """Return the archive size in bytes."""
+        with self._lock:
+            if self._file is None:
+                return 0
+            self._file.seek(0, 2)
+            return self._file.tell()
+
+    def close(self):
+        """Release the spooled archive."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+                self._entries = {}
@@ -1,6 +1,7 @@
 import re
-import io
-import zipfile
+from utils.export import ZipExporter, DEFAULT_COMPRESSION
+from utils.formatters import render_transcript, DEFAULT_FORMAT
+from utils.metrics import timed
 
 def sanitize_filename(title: str, max_length: int = 100) -> str:
     """
@@ -10,28 +11,27 @@ def sanitize_filename(title: str, max_length: int = 100) -> str:
     sanitized = re.sub(r'[<>:"/\\|?*]', '', title)
     return sanitized[:max_length]
 
-def format_transcript_content(transcript: list) -> str:
+@timed('format_transcript_content')
+def format_transcript_content(transcript: list, fmt: str = DEFAULT_FORMAT) -> str:
     """
     Format transcript entries into downloadable text content.
     """
-    content = ""
-    for entry in transcript:
-        timestamp = f"[{entry.get('start'):.2f} → {entry.get('start') + entry.get('duration'):.2f}] "
-        content += f"{timestamp}{entry.get('text')}\n"
-    return content
+    return render_transcript(transcript, fmt)
 
-def create_zip_content(videos: list) -> tuple[bytes, str]:
+@timed('create_zip_content')
+def create_zip_content(videos: list, compression: str = DEFAULT_COMPRESSION) -> tuple[bytes, str]:
     """
     Create a zip file containing multiple transcripts.
     
     Args:
         videos: List of processed video data
+        compression: One of 'fast', 'deflate' or 'stored'
     Returns:
         Tuple of (zip_bytes, filename)
     """
-    zip_buffer = io.BytesIO()
-    with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-        for video in videos:
-            zip_file.writestr(video['filename'], video['content'])
-    
-    return zip_buffer.getvalue(), "transcripts.zip"
+    exporter = ZipExporter(compression=compression)
+    try:
+        exporter.sync(videos)
+        return exporter.getvalue(), "transcripts.zip"
+    finally:
+        exporter.close()
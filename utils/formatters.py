@@ -0,0 +1,143 @@
+"""Transcript rendering in plain text, SRT, WebVTT, JSON and CSV."""
+import io
+import os
+import csv
+import json
+from typing import List, Dict, Iterator, TextIO, Tuple, Union
+import numpy as np
+from utils.transcript import Transcript
+from utils.metrics import timed, count
+
+# Format name -> (file extension, MIME type)
+FORMATS = {
+    'txt': ('.txt', 'text/plain'),
+    'hms': ('.txt', 'text/plain'),
+    'srt': ('.srt', 'application/x-subrip'),
+    'vtt': ('.vtt', 'text/vtt'),
+    'json': ('.json', 'application/json'),
+    'csv': ('.csv', 'text/csv'),
+}
+DEFAULT_FORMAT = 'txt'
+
+# Lines are handed to the output in chunks of this many segments
+WRITE_CHUNK = 1000
+
+
+def _columns(transcript: Union[Transcript, List[Dict]]) -> Tuple[List[str], np.ndarray, np.ndarray]:
+    """Return the transcript's texts and start/duration arrays."""
+    transcript = Transcript.coerce(transcript)
+    return transcript.texts(), transcript.starts, transcript.durations
+
+
+def _clock(seconds: np.ndarray, millis: bool) -> List[Tuple[int, ...]]:
+    """
+    Split times into (hours, minutes, seconds[, milliseconds]) tuples.
+
+    Without milliseconds the time is truncated to the second, matching
+    time.strftime(time.gmtime(...)); with them it is rounded to the millisecond.
+    """
+    if millis:
+        total = np.rint(seconds * 1000).astype(np.int64)
+        total, ms = np.divmod(total, 1000)
+    else:
+        total = np.floor(seconds).astype(np.int64)
+    hours, total = np.divmod(total, 3600)
+    minutes, secs = np.divmod(total, 60)
+    columns = (hours, minutes, secs, ms) if millis else (hours, minutes, secs)
+    return list(zip(*(column.tolist() for column in columns)))
+
+
+def _iter_txt(texts, starts, ends) -> Iterator[str]:
+    for text, start, end in zip(texts, starts.tolist(), ends.tolist()):
+        yield f"[{start:.2f} → {end:.2f}] {text}\n"
+
+
+def _iter_hms(texts, starts, ends) -> Iterator[str]:
+    for text, start, end in zip(texts, _clock(starts, False), _clock(ends, False)):
+        yield "[%02d:%02d:%02d → %02d:%02d:%02d] " % (start + end) + f"{text}\n"
+
+
+def _iter_srt(texts, starts, ends) -> Iterator[str]:
+    for index, (text, start, end) in enumerate(zip(texts, _clock(starts, True), _clock(ends, True)), 1):
+        yield f"{index}\n" + "%02d:%02d:%02d,%03d --> %02d:%02d:%02d,%03d\n" % (start + end) + f"{text}\n\n"
+
+
+def _iter_vtt(texts, starts, ends) -> Iterator[str]:
+    yield "WEBVTT\n\n"
+    for text, start, end in zip(texts, _clock(starts, True), _clock(ends, True)):
+        yield "%02d:%02d:%02d.%03d --> %02d:%02d:%02d.%03d\n" % (start + end) + f"{text}\n\n"
+
+
+def _iter_json(texts, starts, durations) -> Iterator[str]:
+    yield "["
+    dumps = json.JSONEncoder(ensure_ascii=False).encode
+    for index, (text, start, duration) in enumerate(zip(texts, starts.tolist(), durations.tolist())):
+        separator = "," if index else ""
+        yield f'{separator}\n  {{"text": {dumps(text)}, "start": {start!r}, "duration": {duration!r}}}'
+    yield "\n]\n"
+
+
+def _iter_csv(texts, starts, ends) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(('start', 'end', 'text'))
+    for text, start, end in zip(texts, starts.tolist(), ends.tolist()):
+        writer.writerow((f"{start:.3f}", f"{end:.3f}", text))
+        # Hand over whatever the writer produced so output stays streamable
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+_RENDERERS = {
+    'txt': _iter_txt,
+    'hms': _iter_hms,
+    'srt': _iter_srt,
+    'vtt': _iter_vtt,
+    'json': _iter_json,
+    'csv': _iter_csv,
+}
+
+
+def iter_transcript(transcript: Union[Transcript, List[Dict]], fmt: str = DEFAULT_FORMAT) -> Iterator[str]:
+    """
+    Render a transcript piece by piece.
+
+    Args:
+        transcript: Transcript segments with text, start and duration
+        fmt: One of the keys of FORMATS
+    Returns:
+        Iterator of output strings to be concatenated in order
+    """
+    if fmt not in _RENDERERS:
+        raise ValueError(f"Unknown transcript format: {fmt}")
+    texts, starts, durations = _columns(transcript)
+    if fmt == 'json':
+        return _iter_json(texts, starts, durations)
+    return _RENDERERS[fmt](texts, starts, starts + durations)
+
+
+@timed('render_transcript')
+def render_transcript(transcript: Union[Transcript, List[Dict]], fmt: str = DEFAULT_FORMAT) -> str:
+    """Render a whole transcript to a string in the given format."""
+    content = "".join(iter_transcript(transcript, fmt))
+    count("output_chars", len(content), format=fmt)
+    return content
+
+
+def write_transcript(transcript: Union[Transcript, List[Dict]], fp: TextIO, fmt: str = DEFAULT_FORMAT):
+    """Stream a rendered transcript to a text file-like object in chunks."""
+    chunk = []
+    for piece in iter_transcript(transcript, fmt):
+        chunk.append(piece)
+        if len(chunk) >= WRITE_CHUNK:
+            fp.write("".join(chunk))
+            chunk.clear()
+    if chunk:
+        fp.write("".join(chunk))
+
+
+def filename_for_format(filename: str, fmt: str) -> str:
+    """Replace a filename's extension with the one used by the given format."""
+    return os.path.splitext(filename)[0] + FORMATS[fmt][0]
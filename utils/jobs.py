@@ -0,0 +1,184 @@
+"""Background transcription jobs that outlive Streamlit script reruns and sessions."""
+import time
+import uuid
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional, Tuple
+from utils.pipeline import run_pipeline, STAGES, DEFAULT_FETCH_WORKERS, DEFAULT_TRANSLATE_WORKERS
+from utils.transcript import Transcript
+from utils.transcription import PartialTranslationError
+
+logger = logging.getLogger(__name__)
+
+QUEUED, RUNNING, DONE, FAILED = 'queued', 'running', 'done', 'failed'
+DEFAULT_JOB_WORKERS = 2
+# Finished jobs are kept this long so identical submissions reuse their results
+JOB_RETENTION_SECONDS = 3600
+
+
+class Job:
+    """
+    One batch of videos to transcribe.
+
+    Attributes are written by the worker thread under `lock`; readers
+    should use `snapshot` for a consistent view.
+    """
+
+    def __init__(self, key: Tuple, video_ids: List[str], source_lang: str, target_lang: Optional[str]):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.video_ids = video_ids
+        self.source_lang = source_lang
+        self.target_lang = target_lang
+        self.status = QUEUED
+        self.created = time.time()
+        self.finished = None
+        self.stage_done = dict.fromkeys(STAGES, 0)
+        self.results: Dict[str, Transcript] = {}
+        self.errors: Dict[str, str] = {}
+        # Translated chunks of videos still translating, and what was translated of failed ones
+        self.chunks: Dict[str, Dict[int, Transcript]] = {}
+        self.chunk_progress: Dict[str, Tuple[int, int]] = {}
+        self.partial_results: Dict[str, Transcript] = {}
+        self.missing: List[str] = []
+        self.error = None
+        self.lock = threading.Lock()
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in (DONE, FAILED)
+
+    def partial_transcript(self, video_id: str) -> Optional[Transcript]:
+        """Return the chunks of a video translated so far, in time order, or None if there are none."""
+        with self.lock:
+            chunks = self.chunks.get(video_id)
+            parts = [chunks[index] for index in sorted(chunks)] if chunks else None
+        return Transcript.concatenate(parts) if parts else None
+
+    def snapshot(self) -> Dict:
+        """Return a consistent copy of the job's status and progress."""
+        with self.lock:
+            return {
+                'id': self.id,
+                'status': self.status,
+                'total': len(self.video_ids),
+                'stage_done': dict(self.stage_done),
+                'completed': len(self.results) + len(self.errors) + len(self.missing),
+                'errors': dict(self.errors),
+                'missing': list(self.missing),
+                'chunks': dict(self.chunk_progress),
+                'error': self.error,
+            }
+
+
+class JobManager:
+    """
+    Process-wide job queue with a small pool of job runner threads.
+
+    Each job runs its videos through the transcription pipeline. A job
+    submitted with the same videos and languages as a queued, running or
+    recently finished job is not run again: the caller gets the existing
+    job's id and shares its results.
+    """
+
+    def __init__(self, max_jobs: int = DEFAULT_JOB_WORKERS, fetch_workers: int = DEFAULT_FETCH_WORKERS,
+                 translate_workers: int = DEFAULT_TRANSLATE_WORKERS, retention: float = JOB_RETENTION_SECONDS):
+        self.fetch_workers = fetch_workers
+        self.translate_workers = translate_workers
+        self.retention = retention
+        self._jobs: Dict[str, Job] = {}
+        self._by_key: Dict[Tuple, Job] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_jobs, thread_name_prefix="job")
+
+    def submit(self, video_ids: List[str], source_lang: str, target_lang: Optional[str]) -> str:
+        """
+        Queue a job, or return the id of an identical job that is still usable.
+
+        A finished job in which some videos failed is not reused, so
+        submitting again retries them; whatever the first run fetched and
+        translated is served from the caches.
+        """
+        video_ids = list(dict.fromkeys(video_ids))
+        key = (tuple(sorted(video_ids)), source_lang, target_lang or "")
+        with self._lock:
+            self._prune()
+            existing = self._by_key.get(key)
+            if existing is not None and existing.status != FAILED and not (existing.is_finished and existing.errors):
+                logger.info(f"Reusing job {existing.id} for {len(video_ids)} videos")
+                return existing.id
+            job = Job(key, video_ids, source_lang, target_lang)
+            self._jobs[job.id] = job
+            self._by_key[key] = job
+        self._executor.submit(self._run, job)
+        return job.id
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Return a job by id, or None if it is unknown or has expired."""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _prune(self):
+        """Forget finished jobs past the retention period. Caller holds the lock."""
+        cutoff = time.time() - self.retention
+        for job_id, job in list(self._jobs.items()):
+            if job.is_finished and job.finished is not None and job.finished < cutoff:
+                del self._jobs[job_id]
+                if self._by_key.get(job.key) is job:
+                    del self._by_key[job.key]
+
+    def _run(self, job: Job):
+        with job.lock:
+            job.status = RUNNING
+        try:
+            for event in run_pipeline(
+                job.video_ids, job.source_lang, job.target_lang,
+                format_fn=lambda video_id, transcript: transcript,
+                fetch_workers=self.fetch_workers, translate_workers=self.translate_workers
+            ):
+                with job.lock:
+                    if event.partial:
+                        chunk = event.result
+                        job.chunks.setdefault(event.video_id, {})[chunk.index] = chunk.transcript
+                        job.chunk_progress[event.video_id] = (chunk.done, chunk.total)
+                        continue
+                    if event.stage == 'translate' or event.error is not None:
+                        job.chunks.pop(event.video_id, None)
+                        job.chunk_progress.pop(event.video_id, None)
+                    if event.error is not None:
+                        job.errors[event.video_id] = str(event.error)
+                        if isinstance(event.error, PartialTranslationError):
+                            job.partial_results[event.video_id] = event.error.partial
+                        # A failed video will not reach the later stages
+                        for stage in STAGES[STAGES.index(event.stage):]:
+                            job.stage_done[stage] += 1
+                        continue
+                    job.stage_done[event.stage] += 1
+                    if event.stage == 'format':
+                        if event.result:
+                            job.results[event.video_id] = event.result
+                        else:
+                            job.missing.append(event.video_id)
+            # The final status and finish time are set together, so a finished job always has both
+            with job.lock:
+                job.status = DONE
+                job.finished = time.time()
+        except Exception as e:
+            logger.error(f"Job {job.id} failed: {str(e)}")
+            with job.lock:
+                job.status = FAILED
+                job.error = str(e)
+                job.finished = time.time()
+
+
+_job_manager = None
+_job_manager_lock = threading.Lock()
+
+def get_job_manager() -> JobManager:
+    """Return the process-wide job manager shared by all sessions."""
+    global _job_manager
+    with _job_manager_lock:
+        if _job_manager is None:
+            _job_manager = JobManager()
+        return _job_manager
@@ -0,0 +1,272 @@
+"""
+Lightweight in-process metrics: counters, latency histograms and exporters.
+
+Instrumented functions are wrapped with `timed`; counters are bumped with
+`count`. Everything goes to one process-wide registry, which can be turned
+off with METRICS_ENABLED=0, in which case each instrumented call costs a
+single attribute check. Metrics are exported as Prometheus text or JSON,
+optionally over a local HTTP endpoint.
+"""
+import os
+import json
+import time
+import bisect
+import logging
+import functools
+import threading
+from typing import Callable, Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+PREFIX = "transcription"
+# Upper bounds in seconds; the last bucket catches everything slower
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, float("inf"))
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+class Histogram:
+    """Fixed-bucket histogram of observed values."""
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile as the upper bound of the bucket that contains it."""
+        if not self.count:
+            return 0.0
+        rank, seen = q * self.count, 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return self.buckets[-1]
+
+
+class MetricsRegistry:
+    """
+    Thread-safe store of counters and histograms keyed by name and labels.
+
+    Collectors are callables returning {metric_name: value} that are sampled
+    at export time; they report state owned elsewhere, such as cache sizes.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._counters: Dict[Tuple[str, LabelKey], float] = {}
+        self._histograms: Dict[Tuple[str, LabelKey], Histogram] = {}
+        self._collectors: List[Callable[[], Dict[str, float]]] = []
+        self._lock = threading.Lock()
+
+    def count(self, name: str, value: float = 1, **labels):
+        """Add `value` to a counter."""
+        if not self.enabled:
+            return
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        """Record one observation in a histogram."""
+        if not self.enabled:
+            return
+        key = (name, _label_key(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(value)
+
+    def register_collector(self, collector: Callable[[], Dict[str, float]]):
+        """Add a callable sampled at export time."""
+        with self._lock:
+            self._collectors.append(collector)
+
+    def reset(self):
+        """Drop every counter and histogram; collectors stay registered."""
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def _collected(self) -> Dict[str, float]:
+        values = {}
+        for collector in list(self._collectors):
+            try:
+                values.update(collector())
+            except Exception as e:
+                logger.warning(f"Metrics collector failed: {str(e)}")
+        return values
+
+    def snapshot(self) -> Dict:
+        """Return all metrics as plain data, suitable for JSON."""
+        with self._lock:
+            counters = [
+                {'name': name, 'labels': dict(labels), 'value': value}
+                for (name, labels), value in sorted(self._counters.items())
+            ]
+            histograms = [
+                {
+                    'name': name,
+                    'labels': dict(labels),
+                    'count': histogram.count,
+                    'sum': histogram.sum,
+                    'mean': histogram.sum / histogram.count if histogram.count else 0.0,
+                    'p50': histogram.quantile(0.5),
+                    'p95': histogram.quantile(0.95),
+                    'p99': histogram.quantile(0.99),
+                    'buckets': {_format_bound(bound): count
+                                for bound, count in zip(histogram.buckets, histogram.counts)},
+                }
+                for (name, labels), histogram in sorted(self._histograms.items())
+            ]
+        return {
+            'enabled': self.enabled,
+            'counters': counters,
+            'histograms': histograms,
+            'gauges': self._collected(),
+        }
+
+    def to_json(self) -> str:
+        """Return all metrics as a JSON document."""
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self) -> str:
+        """Return all metrics in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = [(key, list(h.counts), h.count, h.sum, h.buckets)
+                          for key, h in sorted(self._histograms.items())]
+        typed = set()
+        for (name, labels), value in counters:
+            metric = f"{PREFIX}_{name}_total"
+            if metric not in typed:
+                lines.append(f"# TYPE {metric} counter")
+                typed.add(metric)
+            lines.append(f"{metric}{_format_labels(labels)} {value}")
+        for (name, labels), counts, count, total, buckets in histograms:
+            metric = f"{PREFIX}_{name}"
+            if metric not in typed:
+                lines.append(f"# TYPE {metric} histogram")
+                typed.add(metric)
+            cumulative = 0
+            for bound, bucket_count in zip(buckets, counts):
+                cumulative += bucket_count
+                bucket_labels = labels + (('le', _format_bound(bound)),)
+                lines.append(f"{metric}_bucket{_format_labels(bucket_labels)} {cumulative}")
+            lines.append(f"{metric}_sum{_format_labels(labels)} {total}")
+            lines.append(f"{metric}_count{_format_labels(labels)} {count}")
+        for name, value in sorted(self._collected().items()):
+            metric = f"{PREFIX}_{name}"
+            lines.append(f"# TYPE {metric} gauge")
+            lines.append(f"{metric} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def _format_bound(bound: float) -> str:
+    return "+Inf" if bound == float("inf") else repr(bound)
+
+
+def _format_labels(labels: LabelKey) -> str:
+    if not labels:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in labels)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(labels, escaped)) + "}"
+
+
+registry = MetricsRegistry(enabled=os.environ.get("METRICS_ENABLED", "1") not in ("0", "false", "no"))
+
+
+def count(name: str, value: float = 1, **labels):
+    """Add `value` to a counter in the shared registry."""
+    if registry.enabled:
+        registry.count(name, value, **labels)
+
+
+def observe(name: str, value: float, **labels):
+    """Record an observation in the shared registry."""
+    if registry.enabled:
+        registry.observe(name, value, **labels)
+
+
+def timed(stage: str):
+    """
+    Decorator recording a function's latency under `stage`.
+
+    Calls are counted in stage_seconds (a histogram) and failures in
+    stage_errors. When metrics are disabled the function is called directly.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not registry.enabled:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            except Exception:
+                registry.count("stage_errors", stage=stage)
+                raise
+            finally:
+                registry.observe("stage_seconds", time.perf_counter() - start, stage=stage)
+        return wrapper
+    return decorator
+
+
+def write_metrics(path: str):
+    """Write the shared registry to a file, as Prometheus text for '.prom' paths and JSON otherwise."""
+    content = registry.to_prometheus() if path.endswith(".prom") else registry.to_json()
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(content)
+
+
+_server = None
+_server_lock = threading.Lock()
+
+def serve_metrics(port: int, host: str = "127.0.0.1") -> int:
+    """
+    Serve the shared registry over HTTP in a daemon thread.
+
+    GET /metrics returns Prometheus text and GET /metrics.json returns JSON.
+    Only one server runs per process; later calls return its port.
+    """
+    global _server
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == "/metrics":
+                body, content_type = registry.to_prometheus(), "text/plain; version=0.0.4"
+            elif self.path == "/metrics.json":
+                body, content_type = registry.to_json(), "application/json"
+            else:
+                self.send_error(404)
+                return
+            data = body.encode('utf-8')
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            logger.debug(format % args)
+
+    with _server_lock:
+        if _server is None:
+            _server = ThreadingHTTPServer((host, port), Handler)
+            threading.Thread(target=_server.serve_forever, name="metrics", daemon=True).start()
+            logger.info(f"Serving metrics on http://{host}:{_server.server_port}/metrics")
+        return _server.server_port
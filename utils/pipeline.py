@@ -0,0 +1,106 @@
+"""Pipelined multi-video transcription: fetch, translate and format stages run concurrently."""
+import queue
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Callable, Iterable, Iterator, NamedTuple, Any
+from utils.transcript import Transcript
+from utils.transcription import resolve_transcript, translate_and_cache_transcript, needs_translation
+from utils.search import index_transcript
+from utils.metrics import count
+
+logger = logging.getLogger(__name__)
+
+STAGES = ('fetch', 'translate', 'format')
+DEFAULT_FETCH_WORKERS = 4
+DEFAULT_TRANSLATE_WORKERS = 2
+
+
+class PipelineEvent(NamedTuple):
+    """
+    Progress report for one video leaving a stage.
+
+    A video emits one event per completed stage. If a stage fails, the
+    video emits a single event carrying the error and goes no further.
+    The 'format' event's result is the packaged video data, or None if
+    the video had no transcript.
+
+    Long transcripts also emit partial 'translate' events, one per
+    translated chunk, whose result is a ChunkProgress. They do not complete
+    the stage.
+    """
+    index: int
+    video_id: str
+    stage: str
+    result: Any = None
+    error: Optional[Exception] = None
+    partial: bool = False
+
+
+def run_pipeline(video_ids: Iterable[str], source_lang: str, target_lang: Optional[str],
+                 format_fn: Callable[[str, Transcript], Dict],
+                 fetch_workers: int = DEFAULT_FETCH_WORKERS,
+                 translate_workers: int = DEFAULT_TRANSLATE_WORKERS) -> Iterator[PipelineEvent]:
+    """
+    Transcribe many videos with bounded concurrency per stage.
+
+    Each video moves through fetch -> translate -> format on its own, so
+    one video can be translating while others are still fetching. Per-stage
+    semaphores cap how many videos are in each stage at once.
+
+    Args:
+        video_ids: YouTube video IDs; event indexes refer to this order
+        source_lang: Source transcript language
+        target_lang: Optional translation language
+        format_fn: Builds the packaged video data from (video_id, transcript)
+        fetch_workers: Maximum concurrent transcript fetches
+        translate_workers: Maximum concurrent translations
+    Returns:
+        Iterator of PipelineEvent, yielded on the calling thread as stages finish
+    """
+    video_ids = list(video_ids)
+    if not video_ids:
+        return
+    fetch_slots = threading.Semaphore(max(1, fetch_workers))
+    translate_slots = threading.Semaphore(max(1, translate_workers))
+    events = queue.Queue()
+    language = target_lang if needs_translation(source_lang, target_lang) else source_lang
+
+    def process(index: int, video_id: str):
+        stage = 'fetch'
+        try:
+            with fetch_slots:
+                resolved = resolve_transcript(video_id, source_lang, target_lang)
+            transcript = resolved.transcript
+            events.put(PipelineEvent(index, video_id, stage))
+
+            stage = 'translate'
+            if resolved.needs_translation and transcript:
+                with translate_slots:
+                    transcript = translate_and_cache_transcript(
+                        video_id, source_lang, target_lang, transcript,
+                        on_chunk=lambda chunk: events.put(PipelineEvent(index, video_id, stage, chunk, partial=True))
+                    )
+            events.put(PipelineEvent(index, video_id, stage))
+
+            # Same indexing as get_transcript, which the pipeline bypasses
+            index_transcript(video_id, language, transcript)
+            stage = 'format'
+            video_data = format_fn(video_id, transcript) if transcript else None
+            events.put(PipelineEvent(index, video_id, stage, result=video_data))
+        except Exception as e:
+            logger.error(f"Video {video_id} failed during {stage}: {str(e)}")
+            count("pipeline_failures", stage=stage)
+            events.put(PipelineEvent(index, video_id, stage, error=e))
+
+    # Enough threads that a full fetch stage never starves the translate stage
+    workers = min(len(video_ids), max(1, fetch_workers) + max(1, translate_workers))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pipeline") as executor:
+        for index, video_id in enumerate(video_ids):
+            executor.submit(process, index, video_id)
+        remaining = len(video_ids)
+        while remaining:
+            event = events.get()
+            if event.error is not None or event.stage == 'format':
+                remaining -= 1
+            yield event
@@ -0,0 +1,55 @@
+"""Rate limiting helpers shared by the network-bound utilities."""
+import threading
+import time
+from utils.metrics import count
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket rate limiter.
+
+    Tokens refill continuously at `rate` per second up to `capacity`.
+    Callers block in `acquire` until enough tokens are available, so a
+    single bucket can pace any number of worker threads. Time spent
+    waiting is counted in the rate_limit_wait_seconds metric under `name`.
+    """
+
+    def __init__(self, rate: float, capacity: float = None, name: str = "default"):
+        if rate <= 0:
+            raise ValueError("Rate must be positive")
+        self.name = name
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        elapsed = now - self._updated
+        if elapsed > 0:
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+            self._updated = now
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        """Take tokens without blocking. Returns False if not enough are available."""
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def acquire(self, tokens: float = 1.0):
+        """Block until `tokens` are available, then consume them."""
+        if tokens > self.capacity:
+            raise ValueError("Cannot acquire more tokens than the bucket capacity")
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+            count("rate_limit_wait_seconds", wait, limiter=self.name)
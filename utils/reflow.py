@@ -0,0 +1,133 @@
+"""Merge caption fragments into sentence- or paragraph-sized segments."""
+import os
+import hashlib
+import logging
+from typing import NamedTuple, Optional
+import numpy as np
+from utils.transcript import Transcript
+from utils.metrics import timed, count
+
+logger = logging.getLogger(__name__)
+
+# Closing punctuation that ends a sentence, including CJK and Devanagari forms
+SENTENCE_END = ".?!…。？！।"
+_SENTENCE_END_CODES = np.array([ord(ch) for ch in SENTENCE_END], dtype=np.uint32)
+
+
+class ReflowOptions(NamedTuple):
+    """
+    How fragments are merged.
+
+    A segment always ends at a pause longer than `max_gap` seconds and, with
+    `sentence_breaks`, after sentence-ending punctuation. `max_duration` and
+    `max_chars` are soft limits: a merged segment may overrun them by at most
+    its last fragment. Sentence-sized output is the default; for
+    paragraph-sized output turn off sentence_breaks and raise the limits.
+    """
+    enabled: bool = True
+    max_gap: float = 1.5
+    max_duration: float = 20.0
+    max_chars: int = 300
+    sentence_breaks: bool = True
+
+    def key(self) -> str:
+        """Short digest identifying these settings; empty when reflow is disabled."""
+        if not self.enabled:
+            return ""
+        return hashlib.blake2b(repr(tuple(self)).encode('utf-8'), digest_size=4).hexdigest()
+
+
+def get_reflow_options() -> ReflowOptions:
+    """
+    Return the reflow options configured for this process.
+
+    Configured through REFLOW_ENABLED, REFLOW_MAX_GAP_SECONDS,
+    REFLOW_MAX_SECONDS, REFLOW_MAX_CHARS and REFLOW_SENTENCE_BREAKS
+    environment variables.
+    """
+    defaults = ReflowOptions()
+    return ReflowOptions(
+        enabled=os.environ.get("REFLOW_ENABLED", "1") != "0",
+        max_gap=float(os.environ.get("REFLOW_MAX_GAP_SECONDS", defaults.max_gap)),
+        max_duration=float(os.environ.get("REFLOW_MAX_SECONDS", defaults.max_duration)),
+        max_chars=int(os.environ.get("REFLOW_MAX_CHARS", defaults.max_chars)),
+        sentence_breaks=os.environ.get("REFLOW_SENTENCE_BREAKS", "1") != "0",
+    )
+
+
+def _group_offsets(values: np.ndarray, first: np.ndarray, group: np.ndarray) -> np.ndarray:
+    """Offset of each element's value from the value at the start of its group."""
+    return values - values[first][group]
+
+
+@timed('reflow')
+def reflow_transcript(transcript: Transcript, options: Optional[ReflowOptions] = None) -> Transcript:
+    """
+    Merge short caption fragments into longer segments and fix overlapping timings.
+
+    Fragments are ordered by start time, whitespace inside each text is
+    collapsed and empty fragments are dropped. Each fragment's duration is
+    then clipped so it ends no later than the next one starts. Boundaries
+    are computed with array operations over the timings and text lengths;
+    only the final text joins touch individual strings.
+
+    Args:
+        transcript: Fetched transcript
+        options: Merge settings (defaults to get_reflow_options())
+    Returns:
+        A new transcript with merged segments, or the input if reflow is disabled
+    """
+    options = options or get_reflow_options()
+    transcript = Transcript.coerce(transcript)
+    if not options.enabled or len(transcript) < 2:
+        return transcript
+
+    texts = [" ".join(text.split()) for text in transcript.texts()]
+    starts, durations = transcript.starts, transcript.durations
+    order = np.argsort(starts, kind='stable')
+    if np.any(order != np.arange(len(order))):
+        starts, durations = starts[order], durations[order]
+        texts = [texts[i] for i in order.tolist()]
+
+    lengths = np.fromiter((len(text) for text in texts), dtype=np.int64, count=len(texts))
+    keep = lengths > 0
+    if not keep.all():
+        starts, durations, lengths = starts[keep], durations[keep], lengths[keep]
+        texts = [text for text, kept in zip(texts, keep.tolist()) if kept]
+    total = len(texts)
+    if total < 2:
+        return Transcript.from_columns(texts, starts, durations)
+
+    # Clip overlaps: a fragment ends no later than the next one starts
+    next_starts = np.append(starts[1:], np.inf)
+    durations = np.clip(np.minimum(durations, next_starts - starts), 0.0, None)
+    ends = starts + durations
+
+    # Hard breaks after a fragment: long pauses and sentence ends
+    hard = np.zeros(total, dtype=bool)
+    hard[:-1] = next_starts[:-1] - ends[:-1] > options.max_gap
+    if options.sentence_breaks:
+        codes = np.frombuffer("".join(texts).encode('utf-32-le'), dtype='<u4')
+        hard |= np.isin(codes[np.cumsum(lengths) - 1], _SENTENCE_END_CODES)
+    hard[-1] = True
+
+    # Soft limits: within each run between hard breaks, split where the running
+    # character count (joined with spaces) or elapsed time crosses a multiple of the limit
+    group = np.concatenate(([0], np.cumsum(hard[:-1])))
+    group_first = np.flatnonzero(np.concatenate(([True], hard[:-1])))
+    chars_before = np.cumsum(lengths + 1) - (lengths + 1)
+    char_bucket = _group_offsets(chars_before, group_first, group) // max(1, options.max_chars)
+    time_bucket = np.floor(_group_offsets(starts, group_first, group) / max(options.max_duration, 1e-9))
+    boundary = np.ones(total, dtype=bool)
+    boundary[1:] = (group[1:] != group[:-1]) | (char_bucket[1:] != char_bucket[:-1]) | (time_bucket[1:] != time_bucket[:-1])
+
+    firsts = np.flatnonzero(boundary)
+    lasts = np.append(firsts[1:], total)
+    merged_starts = starts[firsts]
+    merged_ends = np.maximum.reduceat(ends, firsts)
+    merged_texts = [" ".join(texts[a:b]) for a, b in zip(firsts.tolist(), lasts.tolist())]
+
+    count("reflow_fragments_in", len(transcript))
+    count("reflow_segments_out", len(merged_texts))
+    logger.info(f"Reflowed {len(transcript)} fragments into {len(merged_texts)} segments")
+    return Transcript.from_columns(merged_texts, merged_starts, merged_ends - merged_starts)
@@ -0,0 +1,296 @@
+"""
+Retries, circuit breaking and adaptive concurrency for upstream calls.
+
+Every call to YouTube or Google goes through `resilient_call`, which:
+- classifies failures as permanent (never retried), transient (retried
+  with exponential backoff and full jitter) or throttled (retried with a
+  longer backoff, honouring Retry-After);
+- keeps a circuit breaker per upstream that, after repeated transient or
+  throttled failures, holds calls back for a while;
+- holds a slot of one global concurrency limit that halves on throttling
+  and grows back by one slot per window of successful calls.
+"""
+import os
+import re
+import time
+import random
+import logging
+import threading
+from typing import Callable, Dict, Optional, TypeVar
+from utils.metrics import registry, count
+
+logger = logging.getLogger(__name__)
+
+PERMANENT, TRANSIENT, THROTTLED = 'permanent', 'transient', 'throttled'
+
+BACKOFF_BASE_SECONDS = 0.5
+BACKOFF_MAX_SECONDS = 30.0
+# Throttled calls back off this many times longer than transient ones
+THROTTLE_BACKOFF_FACTOR = 4.0
+BREAKER_FAILURE_THRESHOLD = 5
+BREAKER_RESET_SECONDS = 30.0
+DEFAULT_MAX_CONCURRENCY = int(os.environ.get("UPSTREAM_MAX_CONCURRENCY", 16))
+
+T = TypeVar('T')
+
+
+class PermanentError(Exception):
+    """A failure that retrying cannot fix, e.g. a video without transcripts."""
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose circuit breaker is open."""
+
+
+# Errors from the client libraries, by class name so the libraries need not be imported
+_PERMANENT_ERRORS = {
+    # youtube_transcript_api
+    'TranscriptsDisabled', 'NoTranscriptFound', 'NoTranscriptAvailable', 'VideoUnavailable', 'VideoUnplayable',
+    'InvalidVideoId', 'AgeRestricted', 'NotTranslatable', 'TranslationLanguageNotAvailable',
+    'CookiePathInvalid', 'CookieInvalid', 'FailedToCreateConsentCookie', 'PoTokenRequired',
+    # deep_translator
+    'LanguageNotSupportedException', 'InvalidSourceOrTargetLanguage', 'NotValidPayload', 'NotValidLength',
+    'TranslationNotFound',
+    # pytubefix
+    'VideoPrivate', 'MembersOnly', 'AgeRestrictedError', 'LiveStreamError', 'RecordingUnavailable',
+    'VideoRegionBlocked', 'RegexMatchError',
+    # ours
+    'PermanentError',
+}
+_THROTTLED_ERRORS = {
+    'TooManyRequests', 'RequestBlocked', 'IpBlocked', 'BotDetection', 'CircuitOpenError',
+}
+_THROTTLED_MESSAGE = re.compile(r"Too Many Requests|HTTP Error 429|429 Client Error|status(?: code)?:? 429", re.I)
+
+
+def _status_code(error: BaseException) -> Optional[int]:
+    """HTTP status carried by an exception from requests or urllib, if any."""
+    response = getattr(error, 'response', None)
+    status = getattr(response, 'status_code', None) or getattr(error, 'code', None) or getattr(error, 'status', None)
+    return status if isinstance(status, int) else None
+
+
+def classify_error(error: BaseException) -> str:
+    """Return PERMANENT, TRANSIENT or THROTTLED for an exception or any exception it wraps."""
+    while error is not None:
+        name = type(error).__name__
+        status = _status_code(error)
+        if name in _THROTTLED_ERRORS or status == 429 or _THROTTLED_MESSAGE.search(str(error)):
+            return THROTTLED
+        if name in _PERMANENT_ERRORS:
+            return PERMANENT
+        if status is not None and 400 <= status < 500 and status not in (408, 425):
+            return PERMANENT
+        error = error.__cause__ or error.__context__
+    return TRANSIENT
+
+
+def _retry_after(error: BaseException) -> Optional[float]:
+    """Seconds from a Retry-After response header, if the exception carries one."""
+    headers = getattr(getattr(error, 'response', None), 'headers', None) or getattr(error, 'headers', None)
+    try:
+        return float(headers.get('Retry-After')) if headers else None
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int, kind: str = TRANSIENT, base: float = BACKOFF_BASE_SECONDS,
+                  max_delay: float = BACKOFF_MAX_SECONDS) -> float:
+    """Exponential backoff with full jitter: uniform in [0, base * 2**attempt], capped at max_delay."""
+    if kind == THROTTLED:
+        base *= THROTTLE_BACKOFF_FACTOR
+    return random.uniform(0, min(max_delay, base * (2 ** attempt)))
+
+
+class CircuitBreaker:
+    """
+    Per-upstream circuit breaker.
+
+    After `failure_threshold` consecutive transient or throttled failures
+    the circuit opens and calls are refused for `reset_timeout` seconds.
+    Then one probe call is let through: success closes the circuit, failure
+    opens it again. Permanent failures concern a single video, not the
+    upstream, and do not count.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+    def __init__(self, name: str, failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+                 reset_timeout: float = BREAKER_RESET_SECONDS):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def wait_time(self) -> float:
+        """Return 0 if a call may proceed now, else the seconds until the next probe is allowed."""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return 0.0
+            remaining = self._opened + self.reset_timeout - time.monotonic()
+            if self.state == self.OPEN and remaining <= 0:
+                self.state = self.HALF_OPEN
+                self._probing = False
+            if self.state == self.HALF_OPEN:
+                if not self._probing:
+                    self._probing = True
+                    return 0.0
+                return max(remaining, 0.0) or self.reset_timeout / 10
+            return remaining
+
+    def record_success(self):
+        with self._lock:
+            if self.state != self.CLOSED:
+                logger.info(f"Circuit for {self.name} closed")
+            self.state = self.CLOSED
+            self._failures = 0
+            self._probing = False
+
+    def record_failure(self, kind: str):
+        if kind == PERMANENT:
+            # The upstream answered; only the request was hopeless
+            self.record_success()
+            return
+        with self._lock:
+            self._failures += 1
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.warning(f"Circuit for {self.name} opened after {self._failures} failures")
+                    count("circuit_opened", upstream=self.name)
+                self.state = self.OPEN
+                self._opened = time.monotonic()
+                self._probing = False
+
+
+class AdaptiveLimiter:
+    """
+    Concurrency limit shared by all upstream calls (AIMD).
+
+    Throttling halves the limit; each run of `limit` consecutive successes
+    raises it by one, up to `maximum`. Callers block in `acquire` while the
+    limit is reached.
+    """
+
+    def __init__(self, initial: int = DEFAULT_MAX_CONCURRENCY, minimum: int = 1,
+                 maximum: int = DEFAULT_MAX_CONCURRENCY):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.limit = float(max(minimum, min(initial, maximum)))
+        self.in_flight = 0
+        self._successes = 0
+        self._condition = threading.Condition()
+
+    def acquire(self):
+        with self._condition:
+            while self.in_flight >= int(self.limit):
+                self._condition.wait()
+            self.in_flight += 1
+
+    def release(self):
+        with self._condition:
+            self.in_flight -= 1
+            self._condition.notify()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+    def on_success(self):
+        with self._condition:
+            self._successes += 1
+            if self._successes >= int(self.limit) and self.limit < self.maximum:
+                self._successes = 0
+                self.limit = min(self.maximum, self.limit + 1)
+                self._condition.notify_all()
+
+    def on_throttle(self):
+        with self._condition:
+            self._successes = 0
+            new_limit = max(self.minimum, int(self.limit) // 2)
+            if new_limit < self.limit:
+                logger.warning(f"Upstream throttling: concurrency limit {int(self.limit)} -> {new_limit}")
+            self.limit = float(new_limit)
+
+
+concurrency_limiter = AdaptiveLimiter()
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(upstream: str) -> CircuitBreaker:
+    """Return the process-wide circuit breaker for an upstream."""
+    with _breakers_lock:
+        if upstream not in _breakers:
+            _breakers[upstream] = CircuitBreaker(upstream, BREAKER_FAILURE_THRESHOLD, BREAKER_RESET_SECONDS)
+        return _breakers[upstream]
+
+
+def _resilience_gauges() -> Dict[str, float]:
+    states = {CircuitBreaker.CLOSED: 0, CircuitBreaker.HALF_OPEN: 1, CircuitBreaker.OPEN: 2}
+    gauges = {'concurrency_limit': concurrency_limiter.limit, 'concurrency_in_flight': concurrency_limiter.in_flight}
+    with _breakers_lock:
+        gauges.update((f"circuit_state_{name}", states[breaker.state]) for name, breaker in _breakers.items())
+    return gauges
+
+
+registry.register_collector(_resilience_gauges)
+
+
+def resilient_call(upstream: str, call: Callable[[int], T], attempts: int = 3) -> T:
+    """
+    Run call(attempt) against an upstream with classification, backoff and circuit breaking.
+
+    Args:
+        upstream: Upstream name, e.g. 'youtube_transcripts'; selects the circuit breaker
+        call: Performs one attempt; receives the zero-based attempt number
+        attempts: Maximum attempts, including the first
+    Returns:
+        The call's result
+    Raises:
+        The last exception once attempts run out or on a permanent failure,
+        or CircuitOpenError if the circuit is still open after `attempts`
+        reset timeouts of waiting
+    """
+    breaker = get_breaker(upstream)
+    attempt, deadline = 0, None
+    while True:
+        wait = breaker.wait_time()
+        if wait > 0:
+            # Wait out the outage rather than fail work that a short blip would not have lost;
+            # waiting does not use up attempts, but is bounded by them
+            count("circuit_rejections", upstream=upstream)
+            now = time.monotonic()
+            deadline = deadline or now + attempts * breaker.reset_timeout
+            if now + wait > deadline:
+                raise CircuitOpenError(f"{upstream} is unavailable after repeated failures, retry in {wait:.0f}s")
+            time.sleep(wait)
+            continue
+        last = attempt == attempts - 1
+        with concurrency_limiter:
+            try:
+                result = call(attempt)
+            except Exception as e:
+                kind = classify_error(e)
+                breaker.record_failure(kind)
+                if kind == THROTTLED:
+                    concurrency_limiter.on_throttle()
+                count("upstream_errors", upstream=upstream, kind=kind)
+                logger.error(f"{upstream} attempt {attempt + 1}/{attempts} failed ({kind}): {str(e)}")
+                if kind == PERMANENT or last:
+                    raise
+                delay = _retry_after(e) if kind == THROTTLED else None
+                delay = min(delay, BACKOFF_MAX_SECONDS) if delay is not None else backoff_delay(attempt, kind)
+            else:
+                breaker.record_success()
+                concurrency_limiter.on_success()
+                return result
+        count("retries", operation=upstream, kind=kind)
+        time.sleep(delay)
+        attempt += 1
@@ -0,0 +1,229 @@
+"""Full-text search over fetched transcripts, backed by an on-disk SQLite FTS5 index."""
+import os
+import re
+import time
+import sqlite3
+import logging
+import threading
+from typing import List, Dict, Optional, Tuple
+from utils.transcript import Transcript
+from utils.metrics import registry, timed
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INDEX_PATH = os.path.join(os.path.expanduser("~"), ".cache", "transcription_app", "search.sqlite3")
+DEFAULT_SEARCH_LIMIT = 50
+
+# Segment rowids are (document id << SEGMENT_BITS) | segment index, so a document's
+# segments form one rowid range that FTS5 can delete or filter without a scan
+SEGMENT_BITS = 20
+MAX_SEGMENTS = 1 << SEGMENT_BITS
+
+# Default markers around matched terms in search results
+DEFAULT_HIGHLIGHT = ("**", "**")
+
+_QUERY_TOKENS = re.compile(r'"[^"]*"|\S+')
+
+
+def match_expression(query: str) -> str:
+    """
+    Turn free text into an FTS5 match expression.
+
+    Every word must match; "quoted phrases" match as phrases and a trailing
+    * matches a prefix. Quoting each term keeps FTS5 operators and
+    punctuation in user input from being parsed as query syntax.
+    """
+    terms = []
+    for token in _QUERY_TOKENS.findall(query):
+        phrase = len(token) > 1 and token.startswith('"') and token.endswith('"')
+        prefix = not phrase and token.endswith('*')
+        text = token[1:-1] if phrase else token.strip('"*')
+        if text.strip():
+            terms.append('"' + text.replace('"', '""') + '"' + ('*' if prefix else ''))
+    return " ".join(terms)
+
+
+class SearchIndex:
+    """
+    Inverted index of transcript segments with their video and start time.
+
+    Each (video, language) transcript is one document. Adding a transcript
+    whose content is already indexed is a no-op, so results can be indexed
+    as they come in, cache hits included; changed content replaces the
+    document's segments.
+    """
+
+    def __init__(self, path: str = DEFAULT_INDEX_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS documents ("
+                " doc_id INTEGER PRIMARY KEY, video_id TEXT NOT NULL, language TEXT NOT NULL,"
+                " digest TEXT NOT NULL, segments INTEGER NOT NULL, indexed REAL NOT NULL,"
+                " UNIQUE (video_id, language))"
+            )
+            self._conn.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS segments USING fts5("
+                " text, start UNINDEXED, tokenize = 'unicode61 remove_diacritics 2')"
+            )
+
+    @timed('index_transcript')
+    def add(self, video_id: str, language: str, transcript: Transcript) -> bool:
+        """
+        Index a transcript unless the same content is already indexed.
+
+        Args:
+            video_id: YouTube video ID
+            language: Language the transcript is in
+            transcript: Transcript to index; segments past MAX_SEGMENTS are dropped
+        Returns:
+            True if the index changed
+        """
+        transcript = Transcript.coerce(transcript)
+        digest = transcript.digest()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT doc_id, digest FROM documents WHERE video_id = ? AND language = ?", (video_id, language)
+            ).fetchone()
+            if row is not None and row[1] == digest:
+                return False
+            if row is not None:
+                doc_id = row[0]
+                self._conn.execute("DELETE FROM segments WHERE rowid BETWEEN ? AND ?",
+                                   (doc_id << SEGMENT_BITS, ((doc_id + 1) << SEGMENT_BITS) - 1))
+            else:
+                doc_id = self._conn.execute(
+                    "INSERT INTO documents (video_id, language, digest, segments, indexed) VALUES (?, ?, ?, 0, 0)",
+                    (video_id, language, digest)
+                ).lastrowid
+            if len(transcript) > MAX_SEGMENTS:
+                logger.warning(f"Indexing only the first {MAX_SEGMENTS} of {len(transcript)} segments of {video_id}")
+                transcript = transcript[:MAX_SEGMENTS]
+            base = doc_id << SEGMENT_BITS
+            self._conn.executemany(
+                "INSERT INTO segments (rowid, text, start) VALUES (?, ?, ?)",
+                zip(range(base, base + len(transcript)), transcript.texts(), transcript.starts.tolist())
+            )
+            self._conn.execute(
+                "UPDATE documents SET digest = ?, segments = ?, indexed = ? WHERE doc_id = ?",
+                (digest, len(transcript), time.time(), doc_id)
+            )
+        return True
+
+    @timed('search')
+    def search(self, query: str, limit: int = DEFAULT_SEARCH_LIMIT, ranked: bool = False,
+               highlight: Tuple[str, str] = DEFAULT_HIGHLIGHT) -> List[Dict]:
+        """
+        Find transcript segments matching a query.
+
+        Args:
+            query: Words that must all occur in a segment; see match_expression
+            limit: Maximum number of hits
+            ranked: Order hits by relevance (bm25), which scores every match and
+                slows down for terms found in millions of segments. By default
+                hits come in index order, grouped by video and in time order,
+                and the query stops after `limit` hits
+            highlight: Markers placed around matched terms in 'highlighted'
+        Returns:
+            List of {'video_id', 'language', 'start', 'text', 'highlighted'} dicts
+        """
+        expression = match_expression(query)
+        if not expression:
+            return []
+        order = "ORDER BY rank" if ranked else ""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT rowid, start, text, highlight(segments, 0, ?, ?) FROM segments"
+                f" WHERE segments MATCH ? {order} LIMIT ?",
+                (highlight[0], highlight[1], expression, limit)
+            ).fetchall()
+            doc_ids = sorted({rowid >> SEGMENT_BITS for rowid, *_ in rows})
+            marks = ",".join("?" * len(doc_ids))
+            documents = {
+                doc_id: (video_id, language) for doc_id, video_id, language in self._conn.execute(
+                    f"SELECT doc_id, video_id, language FROM documents WHERE doc_id IN ({marks})", doc_ids
+                )
+            }
+        return [
+            {
+                'video_id': documents[rowid >> SEGMENT_BITS][0],
+                'language': documents[rowid >> SEGMENT_BITS][1],
+                'start': start,
+                'text': text,
+                'highlighted': highlighted,
+            }
+            for rowid, start, text, highlighted in rows if rowid >> SEGMENT_BITS in documents
+        ]
+
+    def remove(self, video_id: str):
+        """Drop every indexed transcript of a video."""
+        with self._lock, self._conn:
+            for (doc_id,) in self._conn.execute(
+                "SELECT doc_id FROM documents WHERE video_id = ?", (video_id,)
+            ).fetchall():
+                self._conn.execute("DELETE FROM segments WHERE rowid BETWEEN ? AND ?",
+                                   (doc_id << SEGMENT_BITS, ((doc_id + 1) << SEGMENT_BITS) - 1))
+            self._conn.execute("DELETE FROM documents WHERE video_id = ?", (video_id,))
+
+    def optimize(self):
+        """Merge the index's b-trees; worth running after large bulk indexing."""
+        with self._lock, self._conn:
+            self._conn.execute("INSERT INTO segments (segments) VALUES ('optimize')")
+
+    def clear(self):
+        """Remove every indexed transcript."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM segments")
+            self._conn.execute("DELETE FROM documents")
+
+    def stats(self) -> Dict:
+        """Return the number of indexed transcripts, videos and segments."""
+        with self._lock:
+            documents, videos, segments = self._conn.execute(
+                "SELECT COUNT(*), COUNT(DISTINCT video_id), COALESCE(SUM(segments), 0) FROM documents"
+            ).fetchone()
+        return {'documents': documents, 'videos': videos, 'segments': segments}
+
+
+_search_index = None
+_index_lock = threading.Lock()
+
+def get_search_index() -> Optional[SearchIndex]:
+    """
+    Return the process-wide search index, or None when indexing is disabled.
+
+    Configured through the SEARCH_INDEX_PATH environment variable; set
+    SEARCH_INDEX_ENABLED=0 to turn indexing off.
+    """
+    global _search_index
+    if os.environ.get("SEARCH_INDEX_ENABLED", "1") == "0":
+        return None
+    with _index_lock:
+        if _search_index is None:
+            _search_index = SearchIndex(path=os.environ.get("SEARCH_INDEX_PATH", DEFAULT_INDEX_PATH))
+        return _search_index
+
+
+def index_transcript(video_id: str, language: str, transcript: Transcript):
+    """Add a transcript to the shared index; failures are logged, never raised."""
+    index = get_search_index()
+    if index is None or transcript is None:
+        return
+    try:
+        index.add(video_id, language, transcript)
+    except Exception as e:
+        logger.warning(f"Failed to index transcript of video {video_id}: {str(e)}")
+
+
+def _search_gauges() -> Dict[str, float]:
+    if _search_index is None:
+        return {}
+    return {f"search_index_{name}": value for name, value in _search_index.stats().items()}
+
+
+registry.register_collector(_search_gauges)
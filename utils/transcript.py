@@ -0,0 +1,179 @@
+"""Compact columnar transcript representation."""
+import struct
+import hashlib
+from typing import List, Dict, Iterable, Iterator, Union
+import numpy as np
+
+_MAGIC = b"TRN1"
+_HEADER = struct.Struct("<4sI")
+
+
+class Transcript:
+    """
+    Transcript stored as parallel arrays instead of one dict per segment.
+
+    Start times and durations are float64 arrays, and all segment texts
+    live in one string buffer addressed by an int64 offsets array. Slicing
+    returns a view that shares the arrays and the text buffer. Iterating
+    or indexing yields plain {'text', 'start', 'duration'} dicts, so code
+    written against the list-of-dicts form keeps working.
+    """
+
+    __slots__ = ('starts', 'durations', '_text', '_offsets', '_digest')
+
+    def __init__(self, starts: np.ndarray, durations: np.ndarray, text: str, offsets: np.ndarray):
+        if len(offsets) != len(starts) + 1 or len(starts) != len(durations):
+            raise ValueError("Transcript arrays have mismatched lengths")
+        self.starts = starts
+        self.durations = durations
+        self._text = text
+        self._offsets = offsets
+        self._digest = None
+
+    @classmethod
+    def from_columns(cls, texts: List[str], starts: Iterable[float], durations: Iterable[float]) -> "Transcript":
+        """Build a transcript from a list of texts and matching timings."""
+        lengths = np.fromiter((len(text) for text in texts), dtype=np.int64, count=len(texts))
+        offsets = np.zeros(len(texts) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        return cls(
+            np.asarray(starts, dtype=np.float64),
+            np.asarray(durations, dtype=np.float64),
+            "".join(texts),
+            offsets,
+        )
+
+    @classmethod
+    def from_segments(cls, segments: Iterable[Dict]) -> "Transcript":
+        """Build a transcript from {'text', 'start', 'duration'} dicts."""
+        texts, starts, durations = [], [], []
+        for segment in segments:
+            texts.append(segment['text'])
+            starts.append(segment['start'])
+            durations.append(segment['duration'])
+        return cls.from_columns(texts, starts, durations)
+
+    @classmethod
+    def coerce(cls, transcript: Union["Transcript", List[Dict]]) -> "Transcript":
+        """Return the transcript as a Transcript, converting a list of dicts if needed."""
+        return transcript if isinstance(transcript, cls) else cls.from_segments(transcript)
+
+    @classmethod
+    def concatenate(cls, parts: Iterable["Transcript"]) -> "Transcript":
+        """Join transcripts, e.g. consecutive slices, into one with its own buffers."""
+        parts = list(parts)
+        if not parts:
+            return cls.from_columns([], [], [])
+        texts = [part._text[int(part._offsets[0]):int(part._offsets[-1])] for part in parts]
+        bases = np.cumsum([0] + [len(text) for text in texts[:-1]])
+        offsets = np.concatenate([np.zeros(1, dtype=np.int64)] + [
+            part._offsets[1:] - part._offsets[0] + base for part, base in zip(parts, bases)
+        ])
+        return cls(
+            np.concatenate([part.starts for part in parts]),
+            np.concatenate([part.durations for part in parts]),
+            "".join(texts),
+            offsets,
+        )
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            start, stop, step = key.indices(len(self))
+            if step != 1:
+                raise ValueError("Transcript slices must be contiguous")
+            stop = max(start, stop)
+            return Transcript(self.starts[start:stop], self.durations[start:stop],
+                              self._text, self._offsets[start:stop + 1])
+        index = range(len(self))[key]
+        return {
+            'text': self._text[self._offsets[index]:self._offsets[index + 1]],
+            'start': float(self.starts[index]),
+            'duration': float(self.durations[index]),
+        }
+
+    def __iter__(self) -> Iterator[Dict]:
+        for text, start, duration in zip(self.texts(), self.starts.tolist(), self.durations.tolist()):
+            yield {'text': text, 'start': start, 'duration': duration}
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Transcript):
+            return NotImplemented
+        return (np.array_equal(self.starts, other.starts)
+                and np.array_equal(self.durations, other.durations)
+                and self.texts() == other.texts())
+
+    def __repr__(self) -> str:
+        return f"Transcript({len(self)} segments)"
+
+    @property
+    def ends(self) -> np.ndarray:
+        return self.starts + self.durations
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held by the arrays and the visible text."""
+        return (self.starts.nbytes + self.durations.nbytes + self._offsets.nbytes
+                + int(self._offsets[-1] - self._offsets[0]))
+
+    def texts(self) -> List[str]:
+        """Return the segment texts as a list of strings."""
+        bounds = self._offsets.tolist()
+        text = self._text
+        return [text[begin:end] for begin, end in zip(bounds, bounds[1:])]
+
+    def with_texts(self, texts: List[str]) -> "Transcript":
+        """Return a transcript with the same timings and new texts, e.g. a translation."""
+        if len(texts) != len(self):
+            raise ValueError("Expected one text per segment")
+        return Transcript.from_columns(texts, self.starts, self.durations)
+
+    def to_list(self) -> List[Dict]:
+        """Return the transcript as a list of {'text', 'start', 'duration'} dicts."""
+        return list(self)
+
+    def to_bytes(self) -> bytes:
+        """Serialize to a compact binary form readable by from_bytes."""
+        base = int(self._offsets[0])
+        text = self._text[base:int(self._offsets[-1])].encode('utf-8')
+        return b"".join((
+            _HEADER.pack(_MAGIC, len(self)),
+            np.ascontiguousarray(self.starts, dtype='<f8').tobytes(),
+            np.ascontiguousarray(self.durations, dtype='<f8').tobytes(),
+            (self._offsets - base).astype('<i8').tobytes(),
+            text,
+        ))
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "Transcript":
+        """Deserialize a transcript produced by to_bytes."""
+        magic, count = _HEADER.unpack_from(data)
+        if magic != _MAGIC:
+            raise ValueError("Not a serialized transcript")
+        position = _HEADER.size
+        starts = np.frombuffer(data, dtype='<f8', count=count, offset=position)
+        position += 8 * count
+        durations = np.frombuffer(data, dtype='<f8', count=count, offset=position)
+        position += 8 * count
+        offsets = np.frombuffer(data, dtype='<i8', count=count + 1, offset=position)
+        position += 8 * (count + 1)
+        # Copy the arrays so they do not pin the serialized buffer in memory
+        return cls(starts.copy(), durations.copy(), data[position:].decode('utf-8'), offsets.copy())
+
+    @staticmethod
+    def is_serialized(data: bytes) -> bool:
+        """Whether data looks like the output of to_bytes."""
+        return data[:len(_MAGIC)] == _MAGIC
+
+    def digest(self) -> str:
+        """Return a content hash of the timings and texts."""
+        if self._digest is None:
+            hasher = hashlib.blake2b(digest_size=16)
+            hasher.update(np.ascontiguousarray(self.starts).tobytes())
+            hasher.update(np.ascontiguousarray(self.durations).tobytes())
+            hasher.update((self._offsets - self._offsets[0]).tobytes())
+            hasher.update(self._text[int(self._offsets[0]):int(self._offsets[-1])].encode('utf-8'))
+            self._digest = hasher.hexdigest()
+        return self._digest
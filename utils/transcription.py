@@ -1,14 +1,91 @@
-from typing import List, Dict, Optional
+from typing import Any, List, Dict, Optional, Union, NamedTuple, Callable
 import os
-import time
 import logging
-from youtube_transcript_api import YouTubeTranscriptApi
-from deep_translator import GoogleTranslator
+import threading
+from collections import Counter
+import numpy as np
+from utils.cache import (
+    TranscriptCache, TranslationMemo, TrackListingCache,
+    get_transcript_cache, get_translation_memo, get_track_listing_cache
+)
+from utils.rate_limit import TokenBucket
+from utils.formatters import write_transcript, _clock
+from utils.transcript import Transcript
+from utils.clients import list_transcripts, get_translator
+from utils.metrics import registry, timed, count
+from utils.resilience import PermanentError, PERMANENT, THROTTLED, classify_error, resilient_call
+from utils.search import index_transcript
+from utils.reflow import ReflowOptions, reflow_transcript, get_reflow_options
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+TRANSCRIPT_ATTEMPTS = 4
+TRANSLATION_ATTEMPTS = 4
+
+# Google rejects requests above 5000 characters
+TRANSLATION_BATCH_CHARS = 4500
+TRANSLATION_REQUESTS_PER_SECOND = 5.0
+translation_rate_limiter = TokenBucket(rate=TRANSLATION_REQUESTS_PER_SECOND, name='translation')
+# Long transcripts are translated in windows of this many seconds, each one checkpointed
+TRANSLATION_CHUNK_SECONDS = float(os.environ.get("TRANSLATION_CHUNK_MINUTES", 10)) * 60
+# Passes over the chunks; chunks that failed in one pass are retried in the next
+TRANSLATION_CHUNK_ROUNDS = 2
+
+# Source language meaning "whichever track the video has"
+AUTO = 'auto'
+
+# How a transcript in the wanted language was obtained, cheapest first
+CACHED = 'cached'                        # served from the transcript cache
+SOURCE = 'source'                        # the source track, no translation wanted
+FALLBACK = 'fallback'                    # another track, the source language is not available
+TARGET_TRACK = 'target_track'            # an existing caption track in the target language
+SERVER_TRANSLATED = 'server_translated'  # YouTube's own translation of the source track
+CLIENT_TRANSLATED = 'client_translated'  # the source track, still to be translated here
+RESOLUTION_PATHS = (CACHED, SOURCE, FALLBACK, TARGET_TRACK, SERVER_TRANSLATED, CLIENT_TRANSLATED)
+
+_resolution_counts = Counter()
+_resolution_lock = threading.Lock()
+
+
+class TrackChoice(NamedTuple):
+    """The caption track to fetch for a request and the path it represents."""
+    path: str
+    track: Any
+    language: str
+
+
+class ResolvedTranscript(NamedTuple):
+    """A fetched transcript and the path it came from."""
+    transcript: Transcript
+    path: str
+
+    @property
+    def needs_translation(self) -> bool:
+        """Whether the transcript still has to be translated client-side."""
+        return self.path == CLIENT_TRANSLATED
+
+
+class ChunkProgress(NamedTuple):
+    """One translated chunk of a long transcript, reported as soon as it is done."""
+    index: int
+    done: int
+    total: int
+    transcript: Transcript
+
+
+class PartialTranslationError(Exception):
+    """
+    Raised when some chunks of a transcript could not be translated.
+
+    `partial` holds the chunks that were translated, in time order, and
+    `failed` the indexes of the chunks that were not.
+    """
+
+    def __init__(self, message: str, partial: Transcript, failed: List[int]):
+        super().__init__(message)
+        self.partial = partial
+        self.failed = failed
+
 def process_transcript_segment(entry: Dict) -> Dict:
     """Format a transcript segment with proper timing."""
     try:
@@ -29,95 +106,357 @@ def process_transcript_segment(entry: Dict) -> Dict:
     except Exception as e:
         raise Exception(f"Failed to process transcript segment: {str(e)}")
 
-def get_transcript(video_id: str, source_lang: str = 'en', target_lang: str = None) -> Optional[List[Dict]]:
-    """Fetch transcript with optional translation."""
-    attempts = 2
-    for attempt in range(attempts):
-        try:
-            logger.info(f"Fetching transcript for video {video_id} (Attempt {attempt + 1}/{attempts})")
-            transcript_list = YouTubeTranscriptApi.list_transcripts(video_id)
-            
-            # Try requested language first
+def needs_translation(source_lang: str, target_lang: Optional[str]) -> bool:
+    """Whether a transcript fetched in source_lang must be translated to target_lang."""
+    return bool(target_lang and target_lang != source_lang and target_lang.strip())
+
+def resolution_stats() -> Dict[str, int]:
+    """Return how many transcripts were obtained through each resolution path."""
+    with _resolution_lock:
+        return {path: _resolution_counts[path] for path in RESOLUTION_PATHS}
+
+registry.register_collector(lambda: {f"resolution_{path}": n for path, n in resolution_stats().items()})
+
+def _record_resolution(video_id: str, resolved: ResolvedTranscript) -> ResolvedTranscript:
+    with _resolution_lock:
+        _resolution_counts[resolved.path] += 1
+    logger.info(f"Resolved transcript for video {video_id} via {resolved.path}")
+    return resolved
+
+@timed('get_transcript')
+def get_transcript(video_id: str, source_lang: str = 'en', target_lang: str = None,
+                   cache: Optional[TranscriptCache] = None,
+                   reflow: Optional[ReflowOptions] = None) -> Optional[Transcript]:
+    """Fetch transcript with optional translation, served from the persistent cache when possible."""
+    cache = cache if cache is not None else get_transcript_cache()
+    resolved = resolve_transcript(video_id, source_lang, target_lang, cache, reflow=reflow)
+    result = resolved.transcript
+    
+    # Translate client-side only when YouTube had no better option
+    if resolved.needs_translation:
+        result = translate_and_cache_transcript(video_id, source_lang, target_lang, result, cache, reflow=reflow)
+    
+    # Make the transcript searchable; already indexed content is skipped
+    language = target_lang if needs_translation(source_lang, target_lang) else source_lang
+    index_transcript(video_id, language, result)
+    return result
+
+def get_cached_transcript(video_id: str, source_lang: str, target_lang: Optional[str] = None,
+                          cache: Optional[TranscriptCache] = None) -> Optional[Transcript]:
+    """Look up a transcript in the cache without touching the network."""
+    cache = cache if cache is not None else get_transcript_cache()
+    cached = cache.get(video_id, source_lang, target_lang)
+    if cached is not None:
+        logger.info(f"Using cached {target_lang or source_lang} transcript for video {video_id}")
+    return cached
+
+@timed('resolve_transcript')
+def resolve_transcript(video_id: str, source_lang: str = 'en', target_lang: Optional[str] = None,
+                       cache: Optional[TranscriptCache] = None,
+                       listing_cache: Optional[TrackListingCache] = None,
+                       reflow: Optional[ReflowOptions] = None) -> ResolvedTranscript:
+    """
+    Fetch a transcript by the cheapest path to the wanted language.
+    
+    The video's caption tracks are listed once and the listing is cached, so
+    retries and later requests for other languages reuse it. Fetched tracks
+    are cached as they came from YouTube and their fragments are merged into
+    longer segments on the way out, so the reflow settings apply to cached
+    transcripts too. A track already in the target language is cached under
+    it; one that still needs client-side translation is cached as the source
+    transcript. Client-side translations are made from merged segments and
+    are cached under a key that includes the reflow settings.
+    
+    Args:
+        video_id: YouTube video ID
+        source_lang: Source transcript language, or 'auto' for any track
+        target_lang: Optional translation language
+        cache: Transcript cache (defaults to the shared one)
+        listing_cache: Track listing cache (defaults to the shared one)
+        reflow: Fragment merging settings (defaults to get_reflow_options())
+    Returns:
+        ResolvedTranscript with the transcript and the path taken
+    """
+    cache = cache if cache is not None else get_transcript_cache()
+    options = reflow or get_reflow_options()
+    translate = needs_translation(source_lang, target_lang)
+    if translate and _translation_key(target_lang, options) != target_lang:
+        translated = get_cached_transcript(video_id, source_lang, _translation_key(target_lang, options), cache)
+        if translated is not None:
+            return _record_resolution(video_id, ResolvedTranscript(translated, CACHED))
+    cached = get_cached_transcript(video_id, source_lang, target_lang if translate else None, cache)
+    if cached is not None:
+        return _record_resolution(video_id, ResolvedTranscript(reflow_transcript(cached, options), CACHED))
+    
+    choice = resolve_track(list_tracks(video_id, listing_cache), source_lang, target_lang)
+    if choice.path == CLIENT_TRANSLATED:
+        source = get_cached_transcript(video_id, source_lang, None, cache)
+        if source is not None:
+            source = reflow_transcript(source, options)
+            return _record_resolution(video_id, ResolvedTranscript(source, CLIENT_TRANSLATED))
+    
+    def fetch(attempt: int) -> Transcript:
+        logger.info(f"Fetching {choice.language} transcript for video {video_id} "
+                    f"(Attempt {attempt + 1}/{TRANSCRIPT_ATTEMPTS})")
+        return _fetch_track(choice.track)
+    
+    result = _with_retries(fetch)
+    translated = choice.path in (TARGET_TRACK, SERVER_TRANSLATED)
+    cache.put(video_id, source_lang, target_lang if translated else None, result)
+    return _record_resolution(video_id, ResolvedTranscript(reflow_transcript(result, options), choice.path))
+
+def _translation_key(target_lang: str, options: ReflowOptions) -> str:
+    """Cache key for a client-side translation, which depends on how its source was reflowed."""
+    digest = options.key()
+    return f"{target_lang}@{digest}" if digest else target_lang
+
+@timed('list_tracks')
+def list_tracks(video_id: str, listing_cache: Optional[TrackListingCache] = None):
+    """Return the caption track listing of a video, listing it at most once per cache lifetime."""
+    listing_cache = listing_cache if listing_cache is not None else get_track_listing_cache()
+    listing = listing_cache.get(video_id)
+    if listing is None:
+        listing = _with_retries(lambda attempt: list_transcripts(video_id))
+        listing_cache.put(video_id, listing)
+    return listing
+
+def _language_matches(code: str, lang: str) -> bool:
+    """Whether a track language code satisfies a requested language, e.g. 'en-US' for 'en'."""
+    return code == lang or ('-' not in lang and code.split('-')[0] == lang)
+
+def _translation_codes(track) -> List[str]:
+    """Language codes YouTube can translate a track into."""
+    if not getattr(track, 'is_translatable', False):
+        return []
+    # Dicts in youtube-transcript-api < 1.0, TranslationLanguage objects after
+    return [option['language_code'] if isinstance(option, dict) else option.language_code
+            for option in track.translation_languages]
+
+def resolve_track(listing, source_lang: str, target_lang: Optional[str] = None) -> TrackChoice:
+    """
+    Pick the caption track that reaches the wanted language most cheaply.
+    
+    With a target language, an existing track in that language wins, then
+    YouTube's server-side translation of the source track, then the source
+    track for client-side translation. Manually created tracks are preferred
+    over generated ones throughout. An 'auto' source, or a source language
+    the video lacks, falls back to the first available track.
+    
+    Args:
+        listing: Iterable of tracks from the transcript API
+        source_lang: Source transcript language, or 'auto'
+        target_lang: Optional translation language
+    Returns:
+        TrackChoice naming the path, the track to fetch and its language
+    """
+    tracks = list(listing)
+    tracks = [track for track in tracks if not track.is_generated] + [track for track in tracks if track.is_generated]
+    if not tracks:
+        raise PermanentError("No transcripts available")
+    
+    sources = tracks if source_lang == AUTO else [
+        track for track in tracks if _language_matches(track.language_code, source_lang)
+    ]
+    base = sources[0] if sources else tracks[0]
+    if not needs_translation(source_lang, target_lang):
+        if not sources:
+            logger.warning(f"Could not find {source_lang} transcript, using {base.language_code}")
+        return TrackChoice(SOURCE if sources else FALLBACK, base, base.language_code)
+    
+    for track in tracks:
+        if _language_matches(track.language_code, target_lang):
+            return TrackChoice(TARGET_TRACK, track, track.language_code)
+    for track in sources or [base]:
+        if target_lang in _translation_codes(track):
+            return TrackChoice(SERVER_TRANSLATED, track.translate(target_lang), target_lang)
+    return TrackChoice(CLIENT_TRANSLATED, base, base.language_code)
+
+def translate_and_cache_transcript(video_id: str, source_lang: str, target_lang: str, transcript: Transcript,
+                                   cache: Optional[TranscriptCache] = None,
+                                   on_chunk: Optional[Callable[[ChunkProgress], None]] = None,
+                                   reflow: Optional[ReflowOptions] = None) -> Transcript:
+    """
+    Translate a reflowed transcript chunk by chunk and store the complete result in the cache.
+    
+    The result is cached under a key carrying the reflow settings the
+    transcript was merged with (defaults to get_reflow_options()).
+    """
+    cache = cache if cache is not None else get_transcript_cache()
+    result = translate_in_chunks(transcript, target_lang, on_chunk=on_chunk)
+    cache.put(video_id, source_lang, _translation_key(target_lang, reflow or get_reflow_options()), result)
+    logger.info(f"Translated transcript to {target_lang}")
+    return result
+
+def split_into_chunks(transcript: Transcript, window_seconds: float = None) -> List[Transcript]:
+    """Split a transcript into consecutive time windows; the chunks are views sharing its arrays."""
+    window = window_seconds or TRANSLATION_CHUNK_SECONDS
+    if len(transcript) == 0:
+        return []
+    first, last = float(transcript.starts[0]), float(transcript.starts[-1])
+    edges = first + window * np.arange(1, int((last - first) // window) + 1)
+    bounds = np.unique(np.concatenate(([0], np.searchsorted(transcript.starts, edges), [len(transcript)])))
+    return [transcript[begin:end] for begin, end in zip(bounds.tolist(), bounds[1:].tolist())]
+
+@timed('translate_in_chunks')
+def translate_in_chunks(transcript: Union[Transcript, List[Dict]], target_lang: str,
+                        on_chunk: Optional[Callable[[ChunkProgress], None]] = None,
+                        window_seconds: float = None,
+                        memo: Optional[TranslationMemo] = None) -> Transcript:
+    """
+    Translate a transcript in independent time-window chunks.
+    
+    A transient failure does not stop the other chunks; failed chunks are
+    retried in later passes. A permanent failure, throttling or an open
+    circuit breaker stops translation at once, since every remaining chunk
+    would fail the same way. Every translated batch is checkpointed in the
+    translation memo, so a retry, or a rerun after a crash, resends only the
+    texts that never came back. Only one chunk's texts are in flight at a time.
+    
+    Args:
+        transcript: Transcript to translate
+        target_lang: Target language
+        on_chunk: Called with each chunk as soon as it is translated
+        window_seconds: Chunk length (defaults to TRANSLATION_CHUNK_SECONDS)
+        memo: Translation memo (defaults to the shared one)
+    Returns:
+        The translated transcript
+    Raises:
+        PartialTranslationError carrying the translated chunks and caused by
+        the first failure, if some chunks still fail after
+        TRANSLATION_CHUNK_ROUNDS passes or a failure stops translation
+    """
+    chunks = split_into_chunks(Transcript.coerce(transcript), window_seconds)
+    results: List[Optional[Transcript]] = [None] * len(chunks)
+    done, error, halted = 0, None, False
+    for _ in range(TRANSLATION_CHUNK_ROUNDS):
+        pending = [index for index, result in enumerate(results) if result is None]
+        if not pending or halted:
+            break
+        for index in pending:
             try:
-                transcript = transcript_list.find_transcript([source_lang])
-                logger.info(f"Found transcript in requested language: {source_lang}")
-            except Exception as lang_error:
-                logger.warning(f"Could not find {source_lang} transcript, trying other languages")
-                
-                # Get all available transcripts
-                try:
-                    available_transcripts = transcript_list.find_manually_created_transcript()
-                except:
-                    try:
-                        available_transcripts = transcript_list.find_generated_transcript()
-                    except:
-                        # Try to get any available transcript
-                        try:
-                            all_transcripts = transcript_list._manually_created_transcripts + transcript_list._generated_transcripts
-                            if all_transcripts:
-                                available_transcripts = all_transcripts[0]
-                            else:
-                                raise Exception("No transcripts available")
-                        except:
-                            raise Exception("Could not find any transcripts")
-                
-                transcript = available_transcripts
-            
-            # Process transcript
-            result = [process_transcript_segment(entry) for entry in transcript.fetch()]
-            logger.info(f"Successfully fetched {len(result)} transcript segments")
-            
-            # Handle translation if needed
-            if target_lang and target_lang != source_lang and target_lang.strip():
-                result = translate_transcript(result, target_lang)
-                logger.info(f"Translated transcript to {target_lang}")
-            
-            return result
-            
-        except Exception as e:
-            logger.error(f"Attempt {attempt + 1} failed: {str(e)}")
-            if attempt == attempts - 1:
-                raise Exception(f"Failed to fetch transcript: {str(e)}")
-            time.sleep(2)
-    
-    return None
-
-def save_transcript_with_timestamps(transcript: List[Dict], filepath: str):
+                results[index] = translate_transcript(chunks[index], target_lang, memo)
+            except Exception as e:
+                logger.warning(f"Translation of chunk {index + 1}/{len(chunks)} failed: {str(e)}")
+                count("translation_chunk_failures")
+                error = error or e
+                # CircuitOpenError counts as throttled; later chunks would fail the same way
+                halted = classify_error(e) in (PERMANENT, THROTTLED)
+                if halted:
+                    break
+                continue
+            done += 1
+            if on_chunk:
+                on_chunk(ChunkProgress(index, done, len(chunks), results[index]))
+    
+    failed = [index for index, result in enumerate(results) if result is None]
+    if failed:
+        partial = Transcript.concatenate(result for result in results if result is not None)
+        raise PartialTranslationError(
+            f"{len(failed)} of {len(chunks)} chunks could not be translated: {str(error)}", partial, failed
+        ) from error
+    return Transcript.concatenate(results) if len(results) != 1 else results[0]
+
+def _with_retries(call, attempts: int = None):
+    """Run call(attempt) against YouTube's transcript service with retries and circuit breaking."""
+    try:
+        return resilient_call('youtube_transcripts', call, attempts or TRANSCRIPT_ATTEMPTS)
+    except Exception as e:
+        raise Exception(f"Failed to fetch transcript: {str(e)}") from e
+
+def _fetch_track(track) -> Transcript:
+    """Download one caption track."""
+    result = Transcript.from_segments(process_transcript_segment(entry) for entry in track.fetch())
+    logger.info(f"Successfully fetched {len(result)} transcript segments")
+    return result
+
+def save_transcript_with_timestamps(transcript: Union[Transcript, List[Dict]], filepath: str):
     """Save transcript with formatted timestamps."""
     os.makedirs(os.path.dirname(filepath), exist_ok=True)
     with open(filepath, 'w', encoding='utf-8') as f:
-        for entry in transcript:
-            timestamp = format_timestamp(entry['start'], entry['duration'])
-            f.write(f"{timestamp}{entry['text']}\n")
+        write_transcript(transcript, f, 'hms')
 
 def format_timestamp(start: float, duration: float) -> str:
     """Format timestamp as [HH:MM:SS → HH:MM:SS]."""
-    end = start + duration
-    start_time = time.strftime('%H:%M:%S', time.gmtime(start))
-    end_time = time.strftime('%H:%M:%S', time.gmtime(end))
-    return f"[{start_time} → {end_time}] "
+    start_time, end_time = _clock(np.array([start, start + duration]), False)
+    return "[%02d:%02d:%02d → %02d:%02d:%02d] " % (start_time + end_time)
 
-def translate_transcript(transcript: List[Dict], target_lang: str) -> List[Dict]:
-    """Translate transcript text while preserving timing."""
+def _pack_batches(texts: List[str], max_chars: int) -> List[List[str]]:
+    """Group texts into batches whose newline-joined length stays within max_chars."""
+    batches, batch, size = [], [], 0
+    for text in texts:
+        cost = len(text) + (1 if batch else 0)
+        if batch and size + cost > max_chars:
+            batches.append(batch)
+            batch, size = [], 0
+            cost = len(text)
+        batch.append(text)
+        size += cost
+    if batch:
+        batches.append(batch)
+    return batches
+
+def _translate_batch(translator, batch: List[str]) -> List[str]:
+    """
+    Translate a batch of single-line texts in one request.
+
+    The texts are sent newline-joined. If the translation does not split back
+    into the same number of lines, the batch is halved and retried, down to
+    one text per request.
+    """
+    def request(text: str) -> str:
+        def attempt_request(attempt: int) -> str:
+            translation_rate_limiter.acquire()
+            count("translation_requests")
+            count("translation_chars_sent", len(text))
+            return translator.translate(text)
+        return resilient_call('google_translate', attempt_request, TRANSLATION_ATTEMPTS)
+
+    if len(batch) == 1:
+        return [request(batch[0])]
+    translated = request("\n".join(batch)) or ""
+    lines = translated.split("\n")
+    if len(lines) == len(batch):
+        return lines
+    logger.warning(f"Translated batch of {len(batch)} came back as {len(lines)} lines, splitting batch")
+    count("translation_batch_splits")
+    middle = len(batch) // 2
+    return _translate_batch(translator, batch[:middle]) + _translate_batch(translator, batch[middle:])
+
+@timed('translate_transcript')
+def translate_transcript(transcript: Union[Transcript, List[Dict]], target_lang: str,
+                         memo: Optional[TranslationMemo] = None) -> Transcript:
+    """
+    Translate transcript text while preserving timing.
+    
+    Each distinct text is translated once: repeats within the transcript and
+    texts already in the translation memo are never sent. The remaining texts
+    are packed into character-sized requests paced by the shared rate limiter,
+    and each request's translations go into the memo as soon as they arrive.
+    """
     try:
-        translator = GoogleTranslator(source='auto', target=target_lang)
-        translated = []
+        transcript = Transcript.coerce(transcript)
+        memo = memo if memo is not None else get_translation_memo()
+        texts = transcript.texts()
+        unique = [text for text in dict.fromkeys(texts) if text.strip()]
+        known = memo.get_many(unique, target_lang)
+        pending = [text for text in unique if text not in known]
+        
+        if pending:
+            translator = get_translator(target_lang)
+            # Newlines separate texts within a request, so flatten any inside a caption
+            flat = [" ".join(text.split("\n")) for text in pending]
+            for batch_texts, batch in zip(_pack_batches(pending, TRANSLATION_BATCH_CHARS),
+                                          _pack_batches(flat, TRANSLATION_BATCH_CHARS)):
+                # Checkpoint each batch so a later failure does not lose it
+                fresh = dict(zip(batch_texts, _translate_batch(translator, batch)))
+                memo.put_many(fresh, target_lang)
+                known.update(fresh)
+        
+        chars_total = sum(len(text) for text in texts)
+        chars_sent = sum(len(text) for text in pending)
+        logger.info(f"Translated {len(texts)} segments ({len(unique)} distinct): "
+                    f"{chars_sent} of {chars_total} characters sent, the rest served from the memo")
         
-        # Batch translate to avoid rate limits
-        batch_size = 10
-        for i in range(0, len(transcript), batch_size):
-            batch = transcript[i:i+batch_size]
-            texts = [entry['text'] for entry in batch]
-            translations = translator.translate_batch(texts)
-            
-            for entry, trans_text in zip(batch, translations):
-                translated.append({
-                    'text': trans_text,
-                    'start': entry['start'],
-                    'duration': entry['duration']
-                })
-            time.sleep(1)  # Rate limiting
-            
-        return translated
+        return transcript.with_texts([known.get(text, text) for text in texts])
     except Exception as e:
-        raise Exception(f"Translation failed: {str(e)}")
+        raise Exception(f"Translation failed: {str(e)}") from e
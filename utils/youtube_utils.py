@@ -1,42 +1,285 @@
-from typing import Optional, Dict, List
-import time
-from pytubefix import YouTube
-from youtube_transcript_api import YouTubeTranscriptApi
+from typing import Optional, Dict, List, Iterable, Iterator, Tuple, Callable, NamedTuple
+import os
+import re
+import json
+import hashlib
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from utils.rate_limit import TokenBucket
+from utils.cache import MetadataCache, PlaylistSnapshotStore, get_metadata_cache, get_playlist_store
+from utils.clients import youtube, playlist, list_transcripts
+from utils.metrics import timed
+from utils.resilience import resilient_call
+
+logger = logging.getLogger(__name__)
+
+# Metadata requests are paced through one bucket shared by every worker thread
+DEFAULT_METADATA_WORKERS = int(os.environ.get("METADATA_WORKERS", 8))
+METADATA_REQUESTS_PER_SECOND = float(os.environ.get("METADATA_REQUESTS_PER_SECOND", 4.0))
+metadata_rate_limiter = TokenBucket(rate=METADATA_REQUESTS_PER_SECOND, name='metadata')
+
+# One anchored pass over the input: an optional youtube.com / youtu.be prefix in any
+# of the common shapes, then the 11-character id. The prefix is case-insensitive,
+# the ids are not. A bare id must contain a digit, '-' or '_', or mix cases beyond an
+# initial capital, so an 11-letter word like "performance" is not read as a video.
+VIDEO_URL_PATTERN = re.compile(
+    r"(?:(?i:(?:https?://)?(?:(?:www|m|music)\.)?"
+    r"(?:youtube(?:-nocookie)?\.com/(?:(?:watch)?\?(?:[^#\s]*?&)?v=|(?:shorts|embed|live|v|e)/)"
+    r"|youtu\.be/))"
+    r"|(?=[\w-]{0,10}[\d_-]|(?=[\w-]{0,10}[a-z])[\w-]{1,10}[A-Z]))"
+    r"([\w-]{11})(?![\w-])"
+)
+PLAYLIST_URL_PATTERN = re.compile(
+    r"(?i:(?:https?://)?(?:(?:www|m|music)\.)?youtube\.com/(?:playlist|watch)?\?(?:[^#\s]*?&)?list=)?"
+    r"((?:PL|UU|LL|FL|OL|RD)[\w-]{10,})(?![\w-])"
+)
 
 def extract_video_id(url: str) -> str:
-    """Extract video ID from YouTube URL."""
-    if "v=" in url:
-        return url.split("v=")[1].split("&")[0]
-    elif "youtu.be/" in url:
-        return url.split("youtu.be/")[1].split("?")[0]
+    """Extract video ID from a YouTube URL or a bare video ID."""
+    match = VIDEO_URL_PATTERN.match(url.strip())
+    if match:
+        return match.group(1)
     raise ValueError("Invalid YouTube URL format")
 
-def get_video_metadata(video_id: str, retry_count: int = 2) -> Optional[Dict]:
+def extract_playlist_id(url: str) -> Optional[str]:
+    """Return the playlist ID of a playlist URL or bare playlist ID, or None."""
+    match = PLAYLIST_URL_PATTERN.match(url.strip())
+    return match.group(1) if match else None
+
+def normalize_video_inputs(lines: Iterable[str],
+                           expand_playlist: Optional[Callable[[str], Iterable[str]]] = None
+                           ) -> Tuple[List[str], List[str]]:
     """
-    Fetch video metadata with retry mechanism.
+    Turn pasted or uploaded lines into video IDs without failing on bad lines.
+    
+    Lines may be video URLs or bare video IDs. Blank lines and lines starting
+    with '#' are ignored. A line naming a video is always read as that video,
+    even if it also carries a playlist.
+    
+    Args:
+        lines: Input lines
+        expand_playlist: Optional callable mapping a playlist ID to its video
+            IDs; without it playlist lines are reported as invalid
+    Returns:
+        Tuple of (video_ids in first-seen order without duplicates, invalid lines)
+    """
+    video_ids, invalid = {}, []
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        match = VIDEO_URL_PATTERN.match(line)
+        if match:
+            video_ids[match.group(1)] = None
+            continue
+        playlist_id = extract_playlist_id(line) if expand_playlist else None
+        if playlist_id:
+            try:
+                video_ids.update(dict.fromkeys(expand_playlist(playlist_id)))
+                continue
+            except Exception as e:
+                logger.warning(f"Could not expand playlist {playlist_id}: {str(e)}")
+        invalid.append(line)
+    return list(video_ids), invalid
+
+def watch_url(video_id: str) -> str:
+    """Return the watch page URL for a video."""
+    return f"https://www.youtube.com/watch?v={video_id}"
+
+def thumbnail_url(video_id: str, quality: str = 'hqdefault') -> str:
+    """Return the thumbnail URL for a video; derived from the id, no network call."""
+    return f"https://i.ytimg.com/vi/{video_id}/{quality}.jpg"
+
+def _build_metadata(video_id: str, fields: Dict) -> Dict:
+    """Combine fetched fields with the ones derived from the video id."""
+    return {
+        'id': video_id,
+        'title': fields['title'],
+        'duration': fields['duration'],
+        'thumbnail_url': thumbnail_url(video_id),
+        'url': watch_url(video_id)
+    }
+
+@timed('fetch_metadata')
+def _fetch_metadata_fields(video_id: str, retry_count: int = 3,
+                           rate_limiter: Optional[TokenBucket] = None) -> Dict:
+    """Fetch the metadata fields that need a network call, with retries and circuit breaking."""
+    limiter = rate_limiter or metadata_rate_limiter
+    
+    def fetch(attempt: int) -> Dict:
+        limiter.acquire()
+        yt = youtube(watch_url(video_id))
+        return {'title': yt.title, 'duration': yt.length}
+    
+    return resilient_call('youtube_metadata', fetch, retry_count)
+
+@timed('get_video_metadata')
+def get_video_metadata(video_id: str, retry_count: int = 3,
+                       rate_limiter: Optional[TokenBucket] = None,
+                       cache: Optional[MetadataCache] = None) -> Optional[Dict]:
+    """
+    Fetch video metadata with retry mechanism, served from the metadata cache when possible.
     
     Args:
         video_id: YouTube video ID
         retry_count: Number of retries on failure
+        rate_limiter: Token bucket pacing requests (defaults to the shared one)
+        cache: Metadata cache (defaults to the shared one)
     Returns:
         Dictionary containing video metadata
     """
-    for attempt in range(retry_count):
-        try:
-            time.sleep(1)  # Rate limiting
-            yt = YouTube(f"https://www.youtube.com/watch?v={video_id}")
-            return {
-                'id': video_id,
-                'title': yt.title,
-                'duration': yt.length,
-                'thumbnail_url': yt.thumbnail_url,
-                'url': yt.watch_url
-            }
-        except Exception as e:
-            if attempt == retry_count - 1:
-                raise e
-            time.sleep(2)  # Longer delay before retry
-    return None
+    cache = cache if cache is not None else get_metadata_cache()
+    fields = cache.get(video_id)
+    if fields is None:
+        fields = _fetch_metadata_fields(video_id, retry_count, rate_limiter)
+        cache.put_many({video_id: fields})
+    return _build_metadata(video_id, fields)
+
+def _safe_metadata_fields(video_id: str, rate_limiter: Optional[TokenBucket]) -> Optional[Dict]:
+    """Fetch metadata fields, logging and swallowing failures so one video cannot abort a batch."""
+    try:
+        return _fetch_metadata_fields(video_id, rate_limiter=rate_limiter)
+    except Exception as e:
+        logger.warning(f"Failed to fetch metadata for video {video_id}: {str(e)}")
+        return None
+
+def iter_video_metadata(video_ids: Iterable[str], max_workers: int = DEFAULT_METADATA_WORKERS,
+                        rate_limiter: Optional[TokenBucket] = None,
+                        cache: Optional[MetadataCache] = None) -> Iterator[Tuple[str, Optional[Dict]]]:
+    """
+    Fetch metadata for many videos, looking all of them up in the cache at once
+    and fetching only the misses concurrently.
+    
+    Args:
+        video_ids: YouTube video IDs, in the order results should be yielded
+        max_workers: Number of concurrent metadata requests
+        rate_limiter: Token bucket shared by all workers (defaults to the shared one)
+        cache: Metadata cache (defaults to the shared one)
+    Returns:
+        Iterator of (video_id, metadata) pairs in input order, yielded as soon as
+        each one is ready. Metadata is None for videos that failed.
+    """
+    video_ids = list(video_ids)
+    if not video_ids:
+        return
+    cache = cache if cache is not None else get_metadata_cache()
+    known = cache.get_many(video_ids)
+    misses = [vid for vid in dict.fromkeys(video_ids) if vid not in known]
+    if not misses:
+        for video_id in video_ids:
+            yield video_id, _build_metadata(video_id, known[video_id])
+        return
+    
+    workers = max(1, min(max_workers, len(misses)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="metadata") as executor:
+        # Misses are fetched in first-occurrence order, so the next one needed is always next in line
+        fetched = zip(misses, executor.map(lambda vid: _safe_metadata_fields(vid, rate_limiter), misses))
+        failed = set()
+        for video_id in video_ids:
+            while video_id not in known and video_id not in failed:
+                fetched_id, fields = next(fetched)
+                if fields is None:
+                    failed.add(fetched_id)
+                else:
+                    known[fetched_id] = fields
+                    cache.put_many({fetched_id: fields})
+            yield video_id, _build_metadata(video_id, known[video_id]) if video_id in known else None
+
+def get_videos_metadata(video_ids: Iterable[str], max_workers: int = DEFAULT_METADATA_WORKERS,
+                        rate_limiter: Optional[TokenBucket] = None,
+                        cache: Optional[MetadataCache] = None) -> Dict[str, Optional[Dict]]:
+    """Fetch metadata for a batch of videos, keyed by video id. Failed videos map to None."""
+    return dict(iter_video_metadata(video_ids, max_workers, rate_limiter, cache))
+
+class PlaylistSync(NamedTuple):
+    """Outcome of syncing a playlist against its stored snapshot."""
+    playlist_id: str
+    videos: List[Dict]      # metadata in playlist order, for videos whose metadata is known
+    added: List[str]        # ids new since the last sync, or failed in it, in playlist order
+    removed: List[str]      # ids no longer in the playlist
+    changed: List[str]      # ids whose title or duration changed (only detected with refresh)
+    failed: List[str]       # ids whose metadata could not be fetched; retried on the next sync
+    first_sync: bool        # no snapshot existed, so every video counts as added
+
+def metadata_hash(fields: Dict) -> str:
+    """Stable short hash of a video's fetched metadata fields."""
+    return hashlib.blake2b(json.dumps(fields, sort_keys=True).encode('utf-8'), digest_size=8).hexdigest()
+
+@timed('sync_playlist')
+def sync_playlist(playlist_url: str, max_workers: int = DEFAULT_METADATA_WORKERS,
+                  refresh: bool = False,
+                  progress: Optional[Callable[[int, int], None]] = None,
+                  store: Optional[PlaylistSnapshotStore] = None,
+                  cache: Optional[MetadataCache] = None) -> PlaylistSync:
+    """
+    Sync a playlist incrementally against the snapshot of its last sync.
+    
+    The playlist is walked once for its current video ids; metadata is only
+    fetched for videos missing from the snapshot, so re-syncing an unchanged
+    playlist costs no metadata requests at all.
+    
+    Args:
+        playlist_url: Playlist URL or ID
+        max_workers: Number of concurrent metadata requests
+        refresh: Refetch the metadata of every video, bypassing the caches,
+            and report videos whose metadata changed
+        progress: Called with (done, total) as metadata for new videos arrives
+        store: Playlist snapshot store (defaults to the shared one)
+        cache: Metadata cache (defaults to the shared one)
+    Returns:
+        PlaylistSync with the playlist's videos and what changed since the last sync
+    """
+    playlist_id = extract_playlist_id(playlist_url)
+    if playlist_id is None:
+        raise ValueError("Invalid YouTube playlist URL format")
+    store = store if store is not None else get_playlist_store()
+    cache = cache if cache is not None else get_metadata_cache()
+    
+    video_ids, _ = normalize_video_inputs(
+        playlist(f"https://www.youtube.com/playlist?list={playlist_id}").video_urls
+    )
+    stored = store.get(playlist_id)
+    snapshot = stored or {'video_ids': [], 'videos': {}}
+    previous = snapshot['videos']
+    previous_ids = set(snapshot['video_ids'])
+    current_ids = set(video_ids)
+    
+    # Known videos keep their snapshot entry; new ones and earlier failures are fetched
+    pending = video_ids if refresh else [vid for vid in video_ids if vid not in previous]
+    entries = {vid: previous[vid] for vid in video_ids if vid in previous}
+    failed, changed = [], []
+    if pending:
+        # A throwaway cache makes a refresh go to the network without losing the shared entries
+        fetch_cache = MetadataCache(":memory:") if refresh else cache
+        for idx, (video_id, metadata) in enumerate(iter_video_metadata(pending, max_workers, cache=fetch_cache)):
+            if metadata is None:
+                if video_id not in entries:
+                    failed.append(video_id)
+            else:
+                fields = {'title': metadata['title'], 'duration': metadata['duration']}
+                digest = metadata_hash(fields)
+                if video_id in entries and entries[video_id]['hash'] != digest:
+                    changed.append(video_id)
+                entries[video_id] = {'fields': fields, 'hash': digest}
+            if progress:
+                progress(idx + 1, len(pending))
+        if refresh:
+            cache.put_many({vid: entry['fields'] for vid, entry in entries.items()})
+    
+    # Failed videos stay out of the snapshot, so the next sync fetches them and reports them as added
+    store.put(playlist_id, [vid for vid in video_ids if vid in entries], entries)
+    sync = PlaylistSync(
+        playlist_id=playlist_id,
+        videos=[_build_metadata(vid, entries[vid]['fields']) for vid in video_ids if vid in entries],
+        added=[vid for vid in video_ids if vid not in previous_ids],
+        removed=[vid for vid in snapshot['video_ids'] if vid not in current_ids],
+        changed=changed,
+        failed=failed,
+        first_sync=stored is None,
+    )
+    logger.info(f"Synced playlist {playlist_id}: {len(video_ids)} videos, {len(sync.added)} added, "
+                f"{len(sync.removed)} removed, {len(pending)} metadata lookups")
+    return sync
 
 def fetch_transcript(video_id: str, language: str = 'en') -> List[Dict]:
     """
@@ -49,7 +292,7 @@ def fetch_transcript(video_id: str, language: str = 'en') -> List[Dict]:
         List of transcript segments with timing
     """
     try:
-        transcript_list = YouTubeTranscriptApi.list_transcripts(video_id)
+        transcript_list = list_transcripts(video_id)
         transcript = transcript_list.find_transcript([language])
         return [
             {